@@ -24,16 +24,29 @@ import logging
 from datetime import datetime
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 快速指纹读取的头/尾块大小
+FINGERPRINT_BLOCK = 64 * 1024
+# 旧版本Python逐块计算哈希时的块大小，大块 update 期间会释放 GIL
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 class FileSync:
     """文件同步器类"""
     
-    def __init__(self, source: str, target: str, mode: str = "one_way"):
+    def __init__(self, source: str, target: str, mode: str = "one_way",
+                 workers: Optional[int] = None, strict: bool = False):
         """
         初始化文件同步器
         
@@ -41,45 +54,80 @@ class FileSync:
             source: 源目录路径
             target: 目标目录路径
             mode: 同步模式 (one_way, two_way, mirror)
+            workers: 并行计算哈希的线程数，默认按CPU核数
+            strict: 严格模式，大小相同且修改时间一致的文件也比较内容
         """
         self.source = Path(source)
         self.target = Path(target)
         self.mode = mode
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.strict = strict
         self.sync_log = []
         self.conflicts = []
-        
-        # 确保目录存在
+        # 已确认存在的父目录，避免每次复制都调用 mkdir
+        self._ensured_parents: Set[str] = set()
+    
+    def _ensure_dirs(self) -> None:
+        """确保源目录和目标目录存在"""
         self.source.mkdir(parents=True, exist_ok=True)
         self.target.mkdir(parents=True, exist_ok=True)
     
-    def calculate_file_hash(self, file_path: Path) -> str:
+    def calculate_file_hash(self, file_path: str) -> str:
         """计算文件哈希值"""
-        if not file_path.exists():
+        if not os.path.exists(file_path):
             return ""
         
-        hash_md5 = hashlib.md5()
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+                # file_digest 在整个读取/计算过程中释放 GIL，便于线程池并行
+                if sys.version_info >= (3, 11):
+                    return hashlib.file_digest(f, "md5").hexdigest()
+                hash_md5 = hashlib.md5()
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
                     hash_md5.update(chunk)
             return hash_md5.hexdigest()
         except Exception as e:
             logger.error(f"计算文件哈希失败 {file_path}: {e}")
             return ""
     
-    def get_file_info(self, file_path: Path) -> Optional[Dict]:
-        """获取文件信息"""
-        if not file_path.exists():
-            return None
-        
+    def _fingerprint(self, file_path: str, size: int) -> bytes:
+        """计算快速指纹: 文件大小 + 头部64KiB + 尾部64KiB 的MD5"""
+        h = hashlib.md5(str(size).encode())
         try:
-            stat = file_path.stat()
+            with open(file_path, "rb") as f:
+                h.update(f.read(FINGERPRINT_BLOCK))
+                if size > FINGERPRINT_BLOCK:
+                    f.seek(max(FINGERPRINT_BLOCK, size - FINGERPRINT_BLOCK))
+                    h.update(f.read(FINGERPRINT_BLOCK))
+            return h.digest()
+        except Exception as e:
+            logger.error(f"计算文件指纹失败 {file_path}: {e}")
+            return b""
+    
+    def _map_parallel(self, func, *iterables) -> List:
+        """在线程池中并行执行 func（重叠磁盘I/O）"""
+        args = list(zip(*iterables))
+        if len(args) <= 1:
+            return [func(*a) for a in args]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(func, *zip(*args)))
+    
+    def hash_files(self, file_paths: List[str]) -> List[str]:
+        """批量计算文件哈希值"""
+        return self._map_parallel(self.calculate_file_hash, file_paths)
+    
+    def get_file_info(self, file_path: str, stat: Optional[os.stat_result] = None) -> Optional[Dict]:
+        """获取文件信息（不计算哈希，哈希在 detect_changes 中按需计算）"""
+        try:
+            if stat is None:
+                stat = os.stat(file_path)
             return {
                 'path': file_path,
                 'size': stat.st_size,
-                'mtime': stat.st_mtime,
-                'hash': self.calculate_file_hash(file_path)
+                'mtime': stat.st_mtime
             }
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.error(f"获取文件信息失败 {file_path}: {e}")
             return None
@@ -87,14 +135,24 @@ class FileSync:
     def scan_directory(self, directory: Path) -> Dict[str, Dict]:
         """扫描目录"""
         files = {}
+        if not os.path.isdir(directory):
+            # 预览模式下目录可能尚未创建，视为空目录
+            return files
+        # 热循环内只使用字符串路径和 os.scandir，避免为每个条目构造 Path 对象
+        root = str(directory)
+        prefix_len = len(os.path.join(root, ''))
+        pending = [root]
         
         try:
-            for item in directory.rglob("*"):
-                if item.is_file():
-                    relative_path = item.relative_to(directory)
-                    file_info = self.get_file_info(item)
-                    if file_info:
-                        files[str(relative_path)] = file_info
+            while pending:
+                with os.scandir(pending.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif entry.is_file():
+                            file_info = self.get_file_info(entry.path, entry.stat())
+                            if file_info:
+                                files[entry.path[prefix_len:]] = file_info
         except Exception as e:
             logger.error(f"扫描目录失败 {directory}: {e}")
         
@@ -110,6 +168,9 @@ class FileSync:
         new_files = {}
         modified_files = {}
         deleted_files = set()
+        # 大小相同但修改时间不同的文件（严格模式下为所有大小相同的文件），
+        # 需要比较内容才能确定是否修改
+        hash_candidates = []
         
         for file_path in all_files:
             source_info = source_files.get(file_path)
@@ -123,10 +184,35 @@ class FileSync:
                 else:
                     new_files[file_path] = target_info
             elif source_info and target_info:
-                if (source_info['size'] != target_info['size'] or 
-                    abs(source_info['mtime'] - target_info['mtime']) > 1 or
-                    source_info['hash'] != target_info['hash']):
+                if source_info['size'] != target_info['size']:
                     modified_files[file_path] = (source_info, target_info)
+                elif self.strict or abs(source_info['mtime'] - target_info['mtime']) > 1:
+                    hash_candidates.append(file_path)
+        
+        if hash_candidates:
+            # 先比较头尾指纹，多数真实修改在这一步即可确定
+            paths, sizes = [], []
+            for file_path in hash_candidates:
+                paths += [source_files[file_path]['path'], target_files[file_path]['path']]
+                sizes += [source_files[file_path]['size']] * 2
+            fingerprints = self._map_parallel(self._fingerprint, paths, sizes)
+            
+            unresolved = []
+            for i, file_path in enumerate(hash_candidates):
+                if fingerprints[2 * i] != fingerprints[2 * i + 1]:
+                    modified_files[file_path] = (source_files[file_path], target_files[file_path])
+                elif sizes[2 * i] > 2 * FINGERPRINT_BLOCK:
+                    # 指纹未覆盖文件中间部分，用完整哈希确认
+                    unresolved.append(file_path)
+            
+            if unresolved:
+                paths = []
+                for file_path in unresolved:
+                    paths += [source_files[file_path]['path'], target_files[file_path]['path']]
+                hashes = self.hash_files(paths)
+                for i, file_path in enumerate(unresolved):
+                    if hashes[2 * i] != hashes[2 * i + 1]:
+                        modified_files[file_path] = (source_files[file_path], target_files[file_path])
         
         return new_files, modified_files, deleted_files
     
@@ -148,6 +234,7 @@ class FileSync:
             self._print_sync_preview(new_files, modified_files, deleted_files)
             return stats
         
+        self._ensure_dirs()
         start_time = time.time()
         
         # 复制新文件
@@ -155,7 +242,7 @@ class FileSync:
             source_path = self.source / file_path
             target_path = self.target / file_path
             
-            if file_info['path'] == source_path:
+            if file_info['path'] == os.path.join(str(self.source), file_path):
                 success = self._copy_file(source_path, target_path)
             else:
                 success = self._copy_file(target_path, source_path)
@@ -208,7 +295,10 @@ class FileSync:
     def _copy_file(self, source_path: Path, target_path: Path) -> bool:
         """复制文件"""
         try:
-            target_path.parent.mkdir(parents=True, exist_ok=True)
+            parent = str(target_path.parent)
+            if parent not in self._ensured_parents:
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                self._ensured_parents.add(parent)
             shutil.copy2(source_path, target_path)
             logger.info(f"文件复制成功: {source_path} -> {target_path}")
             return True
@@ -259,8 +349,12 @@ class FileSync:
         }
         
         try:
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump(log_data, f, ensure_ascii=False, indent=2)
+            if HAS_ORJSON:
+                with open(log_file, 'wb') as f:
+                    f.write(orjson.dumps(log_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(log_file, 'w', encoding='utf-8') as f:
+                    json.dump(log_data, f, ensure_ascii=False, indent=2)
             logger.info(f"同步日志已保存到: {log_file}")
         except Exception as e:
             logger.error(f"保存同步日志失败: {e}")
@@ -275,11 +369,13 @@ def main():
                        default='one_way', help='同步模式')
     parser.add_argument('--dry-run', action='store_true', help='预览模式')
     parser.add_argument('--log', help='同步日志文件路径')
+    parser.add_argument('--workers', type=int, help='并行计算哈希的线程数')
+    parser.add_argument('--strict', action='store_true', help='严格模式，大小和修改时间都相同的文件也比较内容')
     
     args = parser.parse_args()
     
     try:
-        syncer = FileSync(args.source, args.target, args.mode)
+        syncer = FileSync(args.source, args.target, args.mode, args.workers, args.strict)
         stats = syncer.sync_files(args.dry_run)
         
         if args.log:
@@ -5,21 +5,38 @@
 功能：
 - 文件完整性校验（MD5/SHA1/SHA256）
 - 支持校验和生成与校验
-- 支持批量校验
+- 支持批量校验（多线程并行计算哈希）
 
 作者: ToolCollection
 """
 import argparse
+import os
 import sys
 import hashlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
+# 预先构造的哈希对象模板，copy() 比每次 hashlib.new() 初始化开销更小
+_TEMPLATES = {name: hashlib.new(name) for name in ('md5', 'sha1', 'sha256')}
+
+
+def _new_hash(algorithm):
+    template = _TEMPLATES.get(algorithm)
+    if template is not None:
+        try:
+            return template.copy()
+        except ValueError:
+            pass
+    return hashlib.new(algorithm)
 
 def calc_hash(file_path, algorithm):
-    h = hashlib.new(algorithm)
     with open(file_path, 'rb') as f:
+        if sys.version_info >= (3, 11):
+            # file_digest 在读取和计算期间释放 GIL，多线程校验可真正并行
+            return hashlib.file_digest(f, lambda: _new_hash(algorithm)).hexdigest()
+        h = _new_hash(algorithm)
         while True:
-            chunk = f.read(8192)
+            chunk = f.read(1024 * 1024)
             if not chunk:
                 break
             h.update(chunk)
@@ -33,19 +50,29 @@ def generate_checksums(files, algorithm, output):
             print(f"{file}: {hashval}")
     print(f"✅ 校验和已保存到: {output}")
 
-def verify_checksums(checksum_file, algorithm):
-    ok, fail = 0, 0
+def _hash_if_exists(file, algorithm):
+    if not Path(file).exists():
+        return None
+    return calc_hash(file, algorithm)
+
+def verify_checksums(checksum_file, algorithm, threads=None):
+    entries = []
     with open(checksum_file, 'r', encoding='utf-8') as f:
         for line in f:
             if not line.strip():
                 continue
             hashval, file = line.strip().split(None, 1)
-            file = file.strip()
-            if not Path(file).exists():
+            entries.append((hashval, file.strip()))
+
+    # 各文件哈希相互独立，hashlib 在计算时会释放 GIL，线程池即可并行
+    ok, fail = 0, 0
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as executor:
+        results = executor.map(lambda e: _hash_if_exists(e[1], algorithm), entries)
+        for (hashval, file), actual in zip(entries, results):
+            if actual is None:
                 print(f"❌ 文件不存在: {file}")
                 fail += 1
                 continue
-            actual = calc_hash(file, algorithm)
             if actual == hashval:
                 print(f"✅ {file} 校验通过")
                 ok += 1
@@ -77,13 +104,14 @@ def main():
     p_ver = subparsers.add_parser('verify', help='校验文件')
     p_ver.add_argument('checksum_file', help='校验和文件')
     p_ver.add_argument('--algorithm', choices=['md5', 'sha1', 'sha256'], default='md5', help='校验算法')
+    p_ver.add_argument('--threads', type=int, default=None, help='并发线程数（默认CPU核数）')
 
     args = parser.parse_args()
 
     if args.command == 'generate':
         generate_checksums(args.files, args.algorithm, args.output)
     elif args.command == 'verify':
-        verify_checksums(args.checksum_file, args.algorithm)
+        verify_checksums(args.checksum_file, args.algorithm, args.threads)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
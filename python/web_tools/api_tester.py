@@ -15,17 +15,50 @@ API测试器 - RESTful API测试和调试工具
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import argparse
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import logging
 from datetime import datetime
 import time
 import yaml
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from urllib.parse import urlparse
 
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+# 优先使用 libyaml 实现的 C 加载器
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -34,23 +67,38 @@ logger = logging.getLogger(__name__)
 class APITester:
     """API测试器类"""
     
-    def __init__(self, base_url: str = ""):
+    def __init__(self, base_url: str = "", pool_size: int = 256,
+                 history_size: Optional[int] = 10000):
         """
         初始化API测试器
         
         Args:
             base_url: 基础URL
+            pool_size: 每个主机保持的最大连接数
+            history_size: 保留的最近测试结果数量上限，None 表示不限制
         """
         self.base_url = base_url.rstrip('/')
         self.session = requests.Session()
-        self.test_results = []
+        # 默认连接池只有10个连接，批量请求时会频繁丢弃连接并重新握手
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=pool_size,
+                              max_retries=0, pool_block=False)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 长时间运行时只保留最近的结果，避免内存无限增长
+        self.test_results = deque(maxlen=history_size)
+    
+    def _build_url(self, endpoint: str) -> str:
+        """拼接基础URL与端点"""
+        return f"{self.base_url}/{endpoint.lstrip('/')}" if self.base_url else endpoint
     
     def send_request(self, method: str, endpoint: str, 
                     headers: Optional[Dict] = None,
                     data: Optional[Dict] = None,
                     json_data: Optional[Dict] = None,
                     params: Optional[Dict] = None,
-                    timeout: int = 30) -> Dict[str, Any]:
+                    timeout: int = 30,
+                    capture_content: bool = True,
+                    body: str = 'full') -> Dict[str, Any]:
         """
         发送HTTP请求
         
@@ -62,59 +110,106 @@ class APITester:
             json_data: JSON数据
             params: URL参数
             timeout: 超时时间
+            capture_content: 是否保留响应头、解码响应内容并解析JSON
+            body: 响应体处理方式 - full: 完整读取; headers: 收到响应头后关闭连接;
+                  none: 同 headers，但不保留响应头（仅关心状态码时使用）
             
         Returns:
             响应结果
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}" if self.base_url else endpoint
-        
-        start_time = time.time()
+        method = method.upper()
+        url = self._build_url(endpoint)
         
         try:
-            response = self.session.request(
-                method=method.upper(),
+            prepped = self.session.prepare_request(requests.Request(
+                method=method,
                 url=url,
                 headers=headers,
                 data=data,
                 json=json_data,
-                params=params,
-                timeout=timeout
-            )
+                params=params
+            ))
+        except Exception as e:
+            logger.error(f"请求失败: {method} {url} - {e}")
+            return {
+                'method': method,
+                'url': url,
+                'error': str(e),
+                'response_time': 0.0,
+                'success': False
+            }
+        
+        return self._send_prepared(method, url, prepped, timeout,
+                                   capture_content=capture_content, body=body)
+    
+    def _send_prepared(self, method: str, url: str, prepped: requests.PreparedRequest,
+                       timeout: int = 30, settings: Optional[Dict] = None,
+                       capture_content: bool = True,
+                       body: str = 'full') -> Dict[str, Any]:
+        """
+        发送已准备好的请求
+        
+        Args:
+            method: 大写的HTTP方法
+            url: 请求URL（用于日志和报告）
+            prepped: 预先准备好的请求
+            timeout: 超时时间
+            settings: session.merge_environment_settings 的结果，重复发送时可复用
+            capture_content: 是否保留响应头、解码响应内容并解析JSON，为 False 时 headers/content/json 为 None
+            body: 响应体处理方式 (full, headers, none)，非 full 时以 stream 模式发送且不下载响应体
+            
+        Returns:
+            响应结果
+        """
+        read_body = body == 'full'
+        capture_body = capture_content and read_body
+        start_time = time.perf_counter()
+        
+        try:
+            if settings is None:
+                settings = self.session.merge_environment_settings(prepped.url, {}, not read_body,
+                                                                   None, None)
+            response = self.session.send(prepped, timeout=timeout, **settings)
+            if not read_body:
+                # 只需要状态码/响应头，立即关闭而不下载响应体
+                response.close()
             
-            end_time = time.time()
+            end_time = time.perf_counter()
             response_time = end_time - start_time
             
             result = {
-                'method': method.upper(),
+                'method': method,
                 'url': url,
                 'status_code': response.status_code,
                 'response_time': response_time,
-                'headers': dict(response.headers),
-                'content': response.text,
+                'headers': response.headers if capture_content and body != 'none' else None,
+                'content': response.text if capture_body else None,
+                'json': None,
                 'success': response.status_code < 400
             }
             
-            # 尝试解析JSON响应
-            try:
-                result['json'] = response.json()
-            except:
-                result['json'] = None
+            # 仅在响应声明为JSON时才尝试解析
+            if capture_body and 'json' in response.headers.get('content-type', ''):
+                try:
+                    result['json'] = _json_loads(response.content)
+                except ValueError:
+                    result['json'] = None
             
-            logger.info(f"请求完成: {method.upper()} {url} - {response.status_code} ({response_time:.2f}s)")
+            logger.info(f"请求完成: {method} {url} - {response.status_code} ({response_time:.2f}s)")
             
             return result
             
         except Exception as e:
-            end_time = time.time()
+            end_time = time.perf_counter()
             result = {
-                'method': method.upper(),
+                'method': method,
                 'url': url,
                 'error': str(e),
                 'response_time': end_time - start_time,
                 'success': False
             }
             
-            logger.error(f"请求失败: {method.upper()} {url} - {e}")
+            logger.error(f"请求失败: {method} {url} - {e}")
             return result
     
     def load_test_config(self, config_file: str) -> List[Dict[str, Any]]:
@@ -130,120 +225,239 @@ class APITester:
         config_path = Path(config_file)
         
         if config_path.suffix.lower() == '.json':
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _json_loads(config_path.read_bytes())
         elif config_path.suffix.lower() in ['.yaml', '.yml']:
             with open(config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=_YamlLoader)
         else:
             raise ValueError(f"不支持的配置文件格式: {config_path.suffix}")
     
-    def run_tests(self, tests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _run_single_test(self, index: int, total: int, test: Dict[str, Any]) -> Dict[str, Any]:
+        """运行单个测试并验证响应"""
+        logger.info(f"运行测试 {index}/{total}: {test.get('name', f'Test {index}')}")
+        
+        result = self.send_request(
+            method=test.get('method', 'GET'),
+            endpoint=test.get('endpoint', ''),
+            headers=test.get('headers'),
+            data=test.get('data'),
+            json_data=test.get('json'),
+            params=test.get('params'),
+            timeout=test.get('timeout', 30)
+        )
+        
+        # 添加测试信息
+        result['test_name'] = test.get('name', f'Test {index}')
+        result['test_config'] = test
+        
+        # 验证响应（没有任何验证规则时直接跳过）
+        validation = test.get('validation')
+        if validation:
+            compiled = self._compile_validation(validation)
+            if compiled:
+                result['validation'] = self.validate_response(result, validation, compiled)
+        
+        return result
+    
+    def run_tests(self, tests: List[Dict[str, Any]], parallel: int = 1) -> List[Dict[str, Any]]:
         """
         运行测试
         
         Args:
             tests: 测试配置列表
+            parallel: 并行执行的线程数，1 表示顺序执行
             
         Returns:
-            测试结果列表
+            测试结果列表（与配置顺序一致）
         """
-        results = []
+        total = len(tests)
         
-        for i, test in enumerate(tests, 1):
-            logger.info(f"运行测试 {i}/{len(tests)}: {test.get('name', f'Test {i}')}")
-            
-            result = self.send_request(
-                method=test.get('method', 'GET'),
-                endpoint=test.get('endpoint', ''),
-                headers=test.get('headers'),
-                data=test.get('data'),
-                json_data=test.get('json'),
-                params=test.get('params'),
-                timeout=test.get('timeout', 30)
-            )
-            
-            # 添加测试信息
-            result['test_name'] = test.get('name', f'Test {i}')
-            result['test_config'] = test
-            
-            # 验证响应
-            if 'validation' in test:
-                result['validation'] = self.validate_response(result, test['validation'])
-            
-            results.append(result)
+        if parallel > 1 and total > 1:
+            # 各测试相互独立，等待网络I/O时会释放GIL，适合线程池
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                results = list(executor.map(self._run_single_test,
+                                            range(1, total + 1), [total] * total, tests))
+        else:
+            results = [self._run_single_test(i, total, test) for i, test in enumerate(tests, 1)]
         
         self.test_results.extend(results)
         return results
     
-    def validate_response(self, response: Dict[str, Any], validation: Dict[str, Any]) -> Dict[str, Any]:
+    def _compile_validation(self, validation: Dict[str, Any]) -> List[Callable[[Dict[str, Any]], Optional[str]]]:
         """
-        验证响应
+        将验证规则预编译为检查函数列表
         
         Args:
-            response: 响应结果
             validation: 验证规则
             
         Returns:
-            验证结果
+            检查函数列表，每个函数返回错误信息，通过时返回 None
         """
-        validation_result = {
-            'passed': True,
-            'errors': []
-        }
+        checks = []
         
         # 状态码验证
         if 'status_code' in validation:
             expected_status = validation['status_code']
-            if isinstance(expected_status, list):
-                if response['status_code'] not in expected_status:
-                    validation_result['passed'] = False
-                    validation_result['errors'].append(
-                        f"状态码验证失败: 期望 {expected_status}, 实际 {response['status_code']}"
-                    )
-            else:
-                if response['status_code'] != expected_status:
-                    validation_result['passed'] = False
-                    validation_result['errors'].append(
-                        f"状态码验证失败: 期望 {expected_status}, 实际 {response['status_code']}"
-                    )
+            allowed = tuple(expected_status) if isinstance(expected_status, list) else (expected_status,)
+            checks.append(
+                lambda r: None if r['status_code'] in allowed else
+                f"状态码验证失败: 期望 {expected_status}, 实际 {r['status_code']}"
+            )
         
         # 响应时间验证
         if 'max_response_time' in validation:
-            if response['response_time'] > validation['max_response_time']:
-                validation_result['passed'] = False
-                validation_result['errors'].append(
-                    f"响应时间验证失败: 期望 < {validation['max_response_time']}s, "
-                    f"实际 {response['response_time']:.2f}s"
-                )
+            max_time = validation['max_response_time']
+            checks.append(
+                lambda r: None if r['response_time'] <= max_time else
+                f"响应时间验证失败: 期望 < {max_time}s, 实际 {r['response_time']:.2f}s"
+            )
         
         # JSON响应验证
-        if 'json' in validation and response['json']:
-            json_validation = validation['json']
-            for key, expected_value in json_validation.items():
-                if key not in response['json']:
-                    validation_result['passed'] = False
-                    validation_result['errors'].append(f"JSON字段缺失: {key}")
-                elif response['json'][key] != expected_value:
-                    validation_result['passed'] = False
-                    validation_result['errors'].append(
-                        f"JSON字段验证失败: {key} 期望 {expected_value}, "
-                        f"实际 {response['json'][key]}"
-                    )
+        if 'json' in validation:
+            for key, expected_value in validation['json'].items():
+                def check_json(r, key=key, expected_value=expected_value):
+                    if not r['json']:
+                        return None
+                    if key not in r['json']:
+                        return f"JSON字段缺失: {key}"
+                    if r['json'][key] != expected_value:
+                        return f"JSON字段验证失败: {key} 期望 {expected_value}, 实际 {r['json'][key]}"
+                    return None
+                checks.append(check_json)
         
         # 响应内容验证
         if 'contains' in validation:
-            if validation['contains'] not in response['content']:
-                validation_result['passed'] = False
-                validation_result['errors'].append(
-                    f"响应内容验证失败: 期望包含 '{validation['contains']}'"
-                )
+            # 在按响应声明的编码解码后的文本中查找（GBK、Latin-1 等非UTF-8响应同样适用）
+            expected = validation['contains']
+            checks.append(
+                lambda r: None if expected in (r.get('content') or '') else
+                f"响应内容验证失败: 期望包含 '{expected}'"
+            )
+        
+        return checks
+    
+    def validate_response(self, response: Dict[str, Any], validation: Dict[str, Any],
+                          compiled: Optional[List[Callable]] = None) -> Dict[str, Any]:
+        """
+        验证响应
+        
+        Args:
+            response: 响应结果
+            validation: 验证规则
+            compiled: 预编译的检查函数列表，为空时根据 validation 编译
+            
+        Returns:
+            验证结果
+        """
+        if compiled is None:
+            compiled = self._compile_validation(validation)
+        
+        errors = [msg for check in compiled if (msg := check(response))]
+        return {
+            'passed': not errors,
+            'errors': errors
+        }
+    
+    async def _send_async(self, session: 'aiohttp.ClientSession', semaphore: asyncio.Semaphore,
+                          method: str, url: str,
+                          headers: Optional[Dict] = None,
+                          data: Optional[Dict] = None,
+                          json_data: Optional[Dict] = None,
+                          params: Optional[Dict] = None,
+                          timeout: int = 30,
+                          body: str = 'full') -> Dict[str, Any]:
+        """
+        异步发送单个HTTP请求（性能测试并发模式使用）
+        
+        Returns:
+            包含响应时间和是否成功的结果
+        """
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            start_time = loop.time()
+            try:
+                async with session.request(method, url, headers=headers, data=data,
+                                           json=json_data, params=params,
+                                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if body == 'full':
+                        await response.read()
+                    return {
+                        'status_code': response.status,
+                        'response_time': loop.time() - start_time,
+                        'success': response.status < 400
+                    }
+            except Exception as e:
+                logger.error(f"请求失败: {method} {url} - {e}")
+                return {
+                    'error': str(e),
+                    'response_time': loop.time() - start_time,
+                    'success': False
+                }
+    
+    async def _perf_async(self, method: str, url: str, num_requests: int,
+                          concurrency: int, **kwargs) -> List[Dict[str, Any]]:
+        """使用 asyncio + aiohttp 并发执行性能测试请求"""
+        semaphore = asyncio.Semaphore(concurrency)
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency,
+                                         keepalive_timeout=30)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            tasks = [asyncio.create_task(self._send_async(session, semaphore, method, url, **kwargs))
+                     for _ in range(num_requests)]
+            return await asyncio.gather(*tasks)
+    
+    async def _send_httpx(self, client: 'httpx.AsyncClient', semaphore: asyncio.Semaphore,
+                          method: str, url: str,
+                          headers: Optional[Dict] = None,
+                          data: Optional[Dict] = None,
+                          json_data: Optional[Dict] = None,
+                          params: Optional[Dict] = None,
+                          timeout: int = 30,
+                          body: str = 'full') -> Dict[str, Any]:
+        """
+        通过 httpx 异步发送单个HTTP请求（HTTP/2 性能测试使用）
         
-        return validation_result
+        Returns:
+            包含响应时间和是否成功的结果
+        """
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            start_time = loop.time()
+            try:
+                request = client.build_request(method, url, headers=headers, data=data,
+                                               json=json_data, params=params, timeout=timeout)
+                response = await client.send(request, stream=body != 'full')
+                if body == 'full':
+                    await response.aread()
+                await response.aclose()
+                return {
+                    'status_code': response.status_code,
+                    'response_time': loop.time() - start_time,
+                    'success': response.status_code < 400
+                }
+            except Exception as e:
+                logger.error(f"请求失败: {method} {url} - {e}")
+                return {
+                    'error': str(e),
+                    'response_time': loop.time() - start_time,
+                    'success': False
+                }
+    
+    async def _perf_httpx(self, method: str, url: str, num_requests: int,
+                          concurrency: int, **kwargs) -> List[Dict[str, Any]]:
+        """使用 httpx 的 HTTP/2 多路复用并发执行性能测试请求"""
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(http2=True, limits=limits) as client:
+            tasks = [asyncio.create_task(self._send_httpx(client, semaphore, method, url, **kwargs))
+                     for _ in range(num_requests)]
+            return await asyncio.gather(*tasks)
     
     def performance_test(self, method: str, endpoint: str, 
                         num_requests: int = 100,
                         concurrent: bool = False,
+                        concurrency: int = 10,
+                        http2: bool = False,
+                        body: str = 'full',
                         **kwargs) -> Dict[str, Any]:
         """
         性能测试
@@ -252,7 +466,10 @@ class APITester:
             method: HTTP方法
             endpoint: API端点
             num_requests: 请求数量
-            concurrent: 是否并发
+            concurrent: 是否并发（需要安装 aiohttp）
+            concurrency: 并发模式下同时进行的最大请求数
+            http2: 并发模式下使用 httpx 的 HTTP/2 多路复用（需要安装 httpx[http2]）
+            body: 响应体处理方式 (full, headers, none)，只关心状态码时可跳过下载响应体
             **kwargs: 其他请求参数
             
         Returns:
@@ -260,33 +477,64 @@ class APITester:
         """
         logger.info(f"开始性能测试: {method} {endpoint} ({num_requests} 请求)")
         
-        start_time = time.time()
-        response_times = []
+        perf_async = None
+        if concurrent:
+            if http2 and HAS_HTTPX:
+                perf_async = self._perf_httpx
+            elif HAS_AIOHTTP:
+                if http2:
+                    logger.warning("未安装 httpx[http2]，使用 aiohttp (HTTP/1.1) 并发执行")
+                perf_async = self._perf_async
+            else:
+                logger.warning("未安装 aiohttp，回退到顺序执行")
+        
+        start_time = time.perf_counter()
+        response_times = np.empty(num_requests, dtype=np.float64)
         success_count = 0
         error_count = 0
         
-        for i in range(num_requests):
-            result = self.send_request(method, endpoint, **kwargs)
-            response_times.append(result['response_time'])
+        # URL和方法在整个测试中不变，只在循环外计算一次
+        method = method.upper()
+        url = self._build_url(endpoint)
+        
+        if perf_async:
+            results = asyncio.run(perf_async(method, url, num_requests, concurrency,
+                                             body=body, **kwargs))
+        else:
+            # 请求内容在每次迭代中都相同，只准备一次并复用
+            timeout = kwargs.pop('timeout', 30)
+            prepped = self.session.prepare_request(requests.Request(
+                method=method,
+                url=url,
+                headers=kwargs.get('headers'),
+                data=kwargs.get('data'),
+                json=kwargs.get('json_data'),
+                params=kwargs.get('params')
+            ))
+            settings = self.session.merge_environment_settings(prepped.url, {}, body != 'full',
+                                                               None, None)
+            results = (self._send_prepared(method, url, prepped, timeout, settings,
+                                           capture_content=False, body=body)
+                       for _ in range(num_requests))
+        
+        for i, result in enumerate(results):
+            response_times[i] = result['response_time']
             
             if result['success']:
                 success_count += 1
             else:
                 error_count += 1
         
-        end_time = time.time()
+        end_time = time.perf_counter()
         total_time = end_time - start_time
         
         # 计算统计信息
-        response_times.sort()
-        avg_time = sum(response_times) / len(response_times)
-        min_time = response_times[0]
-        max_time = response_times[-1]
-        median_time = response_times[len(response_times) // 2]
+        avg_time = float(response_times.mean())
+        min_time = float(response_times.min())
+        max_time = float(response_times.max())
         
         # 计算百分位数
-        p95 = response_times[int(len(response_times) * 0.95)]
-        p99 = response_times[int(len(response_times) * 0.99)]
+        median_time, p95, p99 = (float(v) for v in np.percentile(response_times, [50, 95, 99]))
         
         performance_result = {
             'total_requests': num_requests,
@@ -311,28 +559,27 @@ class APITester:
         
         return performance_result
     
-    def generate_report(self, output_file: str = None) -> str:
+    def _write_report(self, write: Callable[[str], Any]) -> None:
         """
-        生成测试报告
+        逐段输出测试报告
         
         Args:
-            output_file: 输出文件路径
-            
-        Returns:
-            报告内容
+            write: 接收报告片段的写入函数
         """
-        if not self.test_results:
-            return "没有测试结果可生成报告"
-        
         total_tests = len(self.test_results)
         passed_tests = sum(1 for r in self.test_results if r['success'])
         failed_tests = total_tests - passed_tests
         
         # 计算平均响应时间
-        response_times = [r['response_time'] for r in self.test_results if 'response_time' in r]
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-        
-        report = f"""
+        timed_count = 0
+        total_response_time = 0.0
+        for r in self.test_results:
+            if 'response_time' in r:
+                timed_count += 1
+                total_response_time += r['response_time']
+        avg_response_time = total_response_time / timed_count if timed_count else 0
+        
+        write(f"""
 API测试报告
 生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -344,35 +591,50 @@ API测试报告
   平均响应时间: {avg_response_time:.2f}s
 
 详细结果:
-"""
+""")
         
         for i, result in enumerate(self.test_results, 1):
             status = "✓" if result['success'] else "✗"
-            report += f"\n{i}. {status} {result.get('test_name', f'Test {i}')}\n"
-            report += f"   方法: {result['method']}\n"
-            report += f"   URL: {result['url']}\n"
-            report += f"   状态码: {result.get('status_code', 'N/A')}\n"
-            report += f"   响应时间: {result.get('response_time', 0):.2f}s\n"
+            write(f"\n{i}. {status} {result.get('test_name', f'Test {i}')}\n")
+            write(f"   方法: {result['method']}\n")
+            write(f"   URL: {result['url']}\n")
+            write(f"   状态码: {result.get('status_code', 'N/A')}\n")
+            write(f"   响应时间: {result.get('response_time', 0):.2f}s\n")
             
             if 'validation' in result:
                 validation = result['validation']
                 if validation['passed']:
-                    report += "   验证: ✓ 通过\n"
+                    write("   验证: ✓ 通过\n")
                 else:
-                    report += "   验证: ✗ 失败\n"
+                    write("   验证: ✗ 失败\n")
                     for error in validation['errors']:
-                        report += f"     - {error}\n"
+                        write(f"     - {error}\n")
             
             if not result['success'] and 'error' in result:
-                report += f"   错误: {result['error']}\n"
+                write(f"   错误: {result['error']}\n")
+    
+    def generate_report(self, output_file: str = None) -> str:
+        """
+        生成测试报告
+        
+        Args:
+            output_file: 输出文件路径，指定时报告直接流式写入文件
+            
+        Returns:
+            报告内容（写入文件时返回空字符串）
+        """
+        if not self.test_results:
+            return "没有测试结果可生成报告"
         
         if output_file:
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(report)
+                self._write_report(f.write)
             logger.info(f"测试报告已保存到: {output_file}")
+            return ""
         
-        return report
-
+        parts = []
+        self._write_report(parts.append)
+        return ''.join(parts)
 
 def main():
     """主函数"""
@@ -384,8 +646,15 @@ def main():
     parser.add_argument('--data', help='请求数据JSON文件路径')
     parser.add_argument('--params', help='URL参数JSON文件路径')
     parser.add_argument('--config', help='测试配置文件路径')
+    parser.add_argument('--parallel', type=int, default=1, help='配置文件测试的并行线程数')
     parser.add_argument('--performance', type=int, help='性能测试请求数量')
+    parser.add_argument('--concurrency', type=int, default=0,
+                       help='性能测试并发数（大于0时使用 asyncio + aiohttp 并发请求）')
+    parser.add_argument('--http2', action='store_true',
+                       help='并发性能测试使用 httpx 的 HTTP/2 多路复用')
     parser.add_argument('--timeout', type=int, default=30, help='请求超时时间')
+    parser.add_argument('--status-only', action='store_true',
+                       help='性能测试只检查状态码，不下载响应体')
     parser.add_argument('--report', help='测试报告输出文件路径')
     
     args = parser.parse_args()
@@ -397,7 +666,7 @@ def main():
         if args.config:
             # 从配置文件运行测试
             tests = tester.load_test_config(args.config)
-            results = tester.run_tests(tests)
+            results = tester.run_tests(tests, args.parallel)
         elif args.performance:
             # 性能测试
             headers = None
@@ -405,19 +674,18 @@ def main():
             params = None
             
             if args.headers:
-                with open(args.headers, 'r', encoding='utf-8') as f:
-                    headers = json.load(f)
+                headers = _json_loads(Path(args.headers).read_bytes())
             
             if args.data:
-                with open(args.data, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = _json_loads(Path(args.data).read_bytes())
             
             if args.params:
-                with open(args.params, 'r', encoding='utf-8') as f:
-                    params = json.load(f)
+                params = _json_loads(Path(args.params).read_bytes())
             
             result = tester.performance_test(
                 args.method, args.url, args.performance,
+                concurrent=args.concurrency > 0, concurrency=max(args.concurrency, 1),
+                http2=args.http2, body='none' if args.status_only else 'full',
                 headers=headers, data=data, params=params, timeout=args.timeout
             )
             
@@ -433,16 +701,13 @@ def main():
             params = None
             
             if args.headers:
-                with open(args.headers, 'r', encoding='utf-8') as f:
-                    headers = json.load(f)
+                headers = _json_loads(Path(args.headers).read_bytes())
             
             if args.data:
-                with open(args.data, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                data = _json_loads(Path(args.data).read_bytes())
             
             if args.params:
-                with open(args.params, 'r', encoding='utf-8') as f:
-                    params = json.load(f)
+                params = _json_loads(Path(args.params).read_bytes())
             
             result = tester.send_request(
                 args.method, args.url,
@@ -455,14 +720,15 @@ def main():
             print(f"  成功: {result['success']}")
             
             if result.get('json'):
-                print(f"  响应JSON: {json.dumps(result['json'], indent=2, ensure_ascii=False)}")
+                print(f"  响应JSON: {_json_dumps_pretty(result['json'])}")
             else:
                 print(f"  响应内容: {result.get('content', '')[:500]}...")
         
         # 生成报告
         if args.report:
             report = tester.generate_report(args.report)
-            print(report)
+            if report:
+                print(report)
         
     except Exception as e:
         logger.error(f"API测试失败: {e}")
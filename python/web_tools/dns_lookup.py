@@ -4,26 +4,68 @@ DNS查询器
 
 功能：
 - 查询A/AAAA/MX/CNAME/TXT等DNS记录
-- 支持批量域名查询
+- 支持批量域名查询（asyncio 并发）
 - 支持自定义DNS服务器
 
 作者: ToolCollection
 """
 import argparse
+import asyncio
 import sys
+from functools import lru_cache
+import dns.asyncresolver
 import dns.resolver
 
 
+# 按DNS服务器缓存解析器，避免每次查询都重新读取 /etc/resolv.conf
+_resolver_cache = {}
+_async_resolver_cache = {}
+
+def _get_resolver(dns_server=None, cache=_resolver_cache, factory=dns.resolver.Resolver):
+    resolver = cache.get(dns_server)
+    if resolver is None:
+        resolver = factory()
+        if dns_server:
+            resolver.nameservers = [dns_server]
+        cache[dns_server] = resolver
+    return resolver
+
+@lru_cache(maxsize=4096)
+def _query_dns_cached(domain, record_type, dns_server):
+    # 查询失败时直接抛出异常：lru_cache 不缓存异常，临时性的超时/SERVFAIL 下次会重新查询
+    resolver = _get_resolver(dns_server)
+    answers = resolver.resolve(domain, record_type)
+    return tuple(str(r) for r in answers)
+
 def query_dns(domain, record_type, dns_server=None):
-    resolver = dns.resolver.Resolver()
-    if dns_server:
-        resolver.nameservers = [dns_server]
     try:
-        answers = resolver.resolve(domain, record_type)
-        return [str(r) for r in answers]
+        return list(_query_dns_cached(domain, record_type, dns_server))
     except Exception as e:
         return [f'❌ 查询失败: {e}']
 
+async def _query_dns_async(resolver, semaphore, domain, record_type):
+    async with semaphore:
+        try:
+            answers = await resolver.resolve(domain, record_type)
+            return [str(r) for r in answers]
+        except Exception as e:
+            return [f'❌ 查询失败: {e}']
+
+async def _query_all(domains, record_type, dns_server=None, concurrency=64):
+    resolver = _get_resolver(dns_server, _async_resolver_cache, dns.asyncresolver.Resolver)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    # 重复的域名只查询一次
+    unique_domains = list(dict.fromkeys(domains))
+    results = await asyncio.gather(
+        *[_query_dns_async(resolver, semaphore, domain, record_type) for domain in unique_domains]
+    )
+    cache = dict(zip(unique_domains, results))
+    return [cache[domain] for domain in domains]
+
+def query_dns_batch(domains, record_type, dns_server=None, concurrency=64):
+    """并发查询多个域名，结果顺序与输入一致"""
+    return asyncio.run(_query_all(domains, record_type, dns_server, concurrency))
+
 def main():
     parser = argparse.ArgumentParser(
         description="DNS查询器 - 查询A/AAAA/MX/CNAME/TXT等记录，支持批量域名",
@@ -43,6 +85,7 @@ def main():
     parser.add_argument('--file', help='批量域名文件，每行一个')
     parser.add_argument('--type', default='A', help='记录类型（A, AAAA, MX, CNAME, TXT等）')
     parser.add_argument('--dns', help='自定义DNS服务器')
+    parser.add_argument('--concurrency', type=int, default=64, help='批量查询并发数')
     args = parser.parse_args()
 
     domains = []
@@ -55,9 +98,9 @@ def main():
         print('请指定域名或域名文件')
         sys.exit(1)
 
-    for domain in domains:
+    all_results = query_dns_batch(domains, args.type, args.dns, args.concurrency)
+    for domain, results in zip(domains, all_results):
         print(f'🔍 {domain} [{args.type}]')
-        results = query_dns(domain, args.type, args.dns)
         for r in results:
             print(f'  {r}')
 
@@ -14,34 +14,326 @@
 """
 
 import argparse
+import errno
 import json
+import os
+import select
+import selectors
 import socket
+import struct
 import sys
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 from typing import Dict, List, Optional, Tuple
 import statistics
 
+import numpy as np
+
 try:
     import psutil
     HAS_PSUTIL = True
 except ImportError:
     HAS_PSUTIL = False
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# 非阻塞 connect 正在进行中的返回码（Windows 下为 WSAEWOULDBLOCK）
+_CONNECT_PENDING = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+                    getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+# SO_LINGER 开启且超时为0：close 时发送RST
+_LINGER_ABORT = struct.pack('ii', 1, 0)
+
+# 地址解析缓存: (host, port) -> (过期时间, (family, sockaddr))
+_ADDR_TTL = 60.0
+_addr_cache: Dict[Tuple[str, int], Tuple[float, Tuple[int, tuple]]] = {}
+
+# 网卡地址很少变化，查询结果缓存的秒数
+_IF_ADDRS_TTL = 30.0
+
+
+def _resolve(host: str, port: int) -> Tuple[int, tuple]:
+    """解析主机地址，结果缓存 _ADDR_TTL 秒，避免重复探测时每次都查询DNS"""
+    now = time.monotonic()
+    cached = _addr_cache.get((host, port))
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    # 与原先的 AF_INET socket 保持一致只取IPv4地址，避免本机无IPv6路由时探测失败
+    family, _, _, _, sockaddr = socket.getaddrinfo(
+        host, port, family=socket.AF_INET, type=socket.SOCK_STREAM)[0]
+    _addr_cache[(host, port)] = (now + _ADDR_TTL, (family, sockaddr))
+    return family, sockaddr
+
+
+def _ping_stats_numpy(latency: np.ndarray, ok: np.ndarray) -> Tuple[int, float, float, float, float]:
+    """成功探测的延迟统计: (次数, 平均值, 标准差, 最小值, 最大值)"""
+    values = latency[ok]
+    n = len(values)
+    if n == 0:
+        return 0, np.nan, np.nan, np.nan, np.nan
+    std = values.std(ddof=1) if n > 1 else np.nan
+    return n, values.mean(), std, values.min(), values.max()
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _ping_stats(latency, ok):
+        """单次遍历的 Welford 算法计算延迟统计，返回值同 _ping_stats_numpy"""
+        n = 0
+        mean = 0.0
+        m2 = 0.0
+        low = np.inf
+        high = -np.inf
+        for i in range(latency.shape[0]):
+            if not ok[i]:
+                continue
+            x = latency[i]
+            n += 1
+            delta = x - mean
+            mean += delta / n
+            m2 += delta * (x - mean)
+            low = min(low, x)
+            high = max(high, x)
+        if n == 0:
+            return 0, np.nan, np.nan, np.nan, np.nan
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        return n, mean, std, low, high
+else:
+    _ping_stats = _ping_stats_numpy
+
+
+def _format_timestamps(ns) -> np.ndarray:
+    """
+    epoch 纳秒数组向量化转为本地时间 ISO 字符串 (微秒精度)
+    
+    每个时间戳按各自时刻的UTC偏移换算，监控期间跨过夏令时切换也正确
+    """
+    ns = np.asarray(ns, dtype=np.int64)
+    offsets = np.fromiter((time.localtime(sec).tm_gmtoff for sec in (ns // 1_000_000_000).tolist()),
+                          dtype=np.int64, count=len(ns))
+    return np.datetime_as_string((ns + offsets * 1_000_000_000).astype('datetime64[ns]'), unit='us')
+
+
+def _format_timestamp(ns: int) -> str:
+    """epoch 纳秒转为本地时间 ISO 字符串"""
+    return str(_format_timestamps([ns])[0])
+
+
+class _LineBuffer:
+    """
+    批量输出缓冲：累计 max_lines 行、超过 max_bytes 或距上次输出超过
+    max_delay 秒时才写出，避免高频采样时每次 print 的锁与系统调用开销。
+    按采样间隔 interval 计算行数上限，保证每行最多延迟约 max_delay 秒显示
+    """
+    
+    def __init__(self, interval: float, max_lines: int = 10, max_bytes: int = 4096,
+                 max_delay: float = 1.0):
+        self.max_lines = max(1, min(max_lines, int(max_delay / interval) if interval > 0 else max_lines))
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._lines: List[str] = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+    
+    def write(self, line: str):
+        self._lines.append(line)
+        self._size += len(line) + 1
+        if (len(self._lines) >= self.max_lines or self._size >= self.max_bytes
+                or time.monotonic() - self._last_flush >= self.max_delay):
+            self.flush()
+    
+    def flush(self):
+        if self._lines:
+            sys.stdout.write('\n'.join(self._lines) + '\n')
+            sys.stdout.flush()
+            self._lines.clear()
+            self._size = 0
+        self._last_flush = time.monotonic()
+
+
+class PingResults:
+    """
+    以结构数组 (SoA) 保存 ping 结果
+    
+    每条结果只占用几个定长数组槽位，长时间监控时内存远小于字典列表；
+    容量不足时按倍数扩容。错误信息和目标主机存为字符串表的下标。
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.ts = np.empty(capacity, dtype=np.int64)  # 时间戳 (epoch 纳秒)
+        self.latency = np.empty(capacity, dtype=np.float64)
+        self.ok = np.empty(capacity, dtype=np.bool_)
+        self.error_code = np.empty(capacity, dtype=np.int32)
+        self.target_code = np.empty(capacity, dtype=np.int32)
+        self.errors: List[str] = []
+        self.targets: List[Tuple[str, int]] = []
+        self._error_index: Dict[str, int] = {}
+        self._target_index: Dict[Tuple[str, int], int] = {}
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    @staticmethod
+    def _intern(value, table: List, index: Dict) -> int:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(table)
+            table.append(value)
+        return code
+    
+    def _grow(self):
+        capacity = max(1, len(self.ts) * 2)
+        for name in ('ts', 'latency', 'ok', 'error_code', 'target_code'):
+            setattr(self, name, np.resize(getattr(self, name), capacity))
+    
+    def append(self, result: Dict):
+        """追加一条 ping_host 返回的结果"""
+        if self.size == len(self.ts):
+            self._grow()
+        
+        i = self.size
+        self.ts[i] = result['timestamp']
+        self.ok[i] = result['success']
+        self.latency[i] = result['latency'] if result['success'] else np.nan
+        self.error_code[i] = (-1 if result['error'] is None else
+                              self._intern(result['error'], self.errors, self._error_index))
+        self.target_code[i] = self._intern((result['host'], result['port']),
+                                           self.targets, self._target_index)
+        self.size += 1
+    
+    def latency_stats(self) -> Tuple[int, float, float, float, float]:
+        """成功探测的延迟统计: (次数, 平均值, 标准差, 最小值, 最大值)"""
+        n = self.size
+        return _ping_stats(self.latency[:n], self.ok[:n])
+    
+    def error_counts(self) -> Dict[str, int]:
+        """按错误信息统计失败次数"""
+        n = self.size
+        codes = self.error_code[:n][~self.ok[:n]]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.errors))
+        return {error: int(count) for error, count in zip(self.errors, counts) if count}
+    
+    def iter_dicts(self):
+        """按需逐条还原为与 ping_host 相同格式的字典"""
+        n = self.size
+        # 时间戳一次性向量化格式化为本地时间 ISO 字符串
+        stamps = _format_timestamps(self.ts[:n])
+        
+        oks = self.ok[:n].tolist()
+        latencies = self.latency[:n].tolist()
+        error_codes = self.error_code[:n].tolist()
+        target_codes = self.target_code[:n].tolist()
+        for i in range(n):
+            host, port = self.targets[target_codes[i]]
+            ok = oks[i]
+            code = error_codes[i]
+            yield {
+                'host': host,
+                'port': port,
+                'timestamp': str(stamps[i]),
+                'success': ok,
+                'latency': latencies[i] if ok else None,
+                'error': self.errors[code] if code >= 0 else None
+            }
 
 class NetworkMonitor:
     """网络监控器类"""
     
-    def __init__(self):
-        """初始化网络监控器"""
+    def __init__(self, probe_mode: str = 'graceful'):
+        """
+        初始化网络监控器
+        
+        Args:
+            probe_mode: 探测连接的关闭方式，graceful 正常关闭；abortive 以RST关闭，
+                不留下 TIME_WAIT，适合高频持续监控
+        """
+        # 先置空需要释放的资源，参数校验失败时 __del__ -> close() 也能安全执行
+        self._netdev_fd: Optional[int] = None
+        self._wakeup_r = self._wakeup_w = None
+        if probe_mode not in ('graceful', 'abortive'):
+            raise ValueError(f"不支持的探测模式: {probe_mode}")
+        self.probe_mode = probe_mode
         self.stats = {
-            'ping_results': [],
+            'ping_results': PingResults(),
             'connection_tests': [],
             'bandwidth_stats': [],
             'start_time': datetime.now()
         }
+        self._if_addrs_cache: Tuple[float, Optional[Dict]] = (0.0, None)
+        
+        # stop() 通过 socketpair 唤醒正在等待下一次采样的循环
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        
+        # Linux 下保持 /proc/net/dev 打开，采样时直接 pread 读取
+        if sys.platform.startswith('linux'):
+            try:
+                self._netdev_fd = os.open('/proc/net/dev', os.O_RDONLY)
+            except OSError:
+                pass
+        
+        if HAS_NUMBA:
+            # 预先触发JIT编译，避免首次生成摘要时计入编译耗时
+            _ping_stats(np.zeros(2), np.ones(2, dtype=np.bool_))
+        
+    def close(self):
+        """释放保持打开的文件描述符"""
+        if self._netdev_fd is not None:
+            os.close(self._netdev_fd)
+            self._netdev_fd = None
+        if self._wakeup_r is not None:
+            self._wakeup_r.close()
+            self._wakeup_w.close()
+            self._wakeup_r = self._wakeup_w = None
+    
+    def stop(self):
+        """停止正在进行的带宽监控（可从其他线程调用）"""
+        try:
+            self._wakeup_w.send(b'\0')
+        except OSError:
+            pass
+    
+    def __del__(self):
+        self.close()
+    
+    def _read_net_totals(self) -> Tuple[int, int]:
+        """读取所有网卡的累计 (发送字节, 接收字节)"""
+        if self._netdev_fd is None:
+            io = psutil.net_io_counters(pernic=False)
+            return io.bytes_sent, io.bytes_recv
         
+        # 前两行为表头；每行 "网卡: 接收8列 发送8列"，取接收/发送字节列
+        # 网卡很多时内容可能超过一次读取的大小，循环读到文件末尾
+        data = b''
+        while True:
+            chunk = os.pread(self._netdev_fd, 65536, len(data))
+            if not chunk:
+                break
+            data += chunk
+        
+        sent = recv = 0
+        for line in data.splitlines()[2:]:
+            fields = line.split(b':', 1)[1].split()
+            recv += int(fields[0])
+            sent += int(fields[8])
+        return sent, recv
+    
     def ping_host(self, host: str, port: int = 80, timeout: float = 5.0) -> Dict:
         """
         测试主机连通性
@@ -54,28 +346,46 @@ class NetworkMonitor:
         Returns:
             测试结果字典
         """
-        start_time = time.time()
         result = {
             'host': host,
             'port': port,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.time_ns(),  # epoch 纳秒，生成报告时再格式化
             'success': False,
             'latency': None,
             'error': None
         }
         
+        sock = None
         try:
-            # 创建socket连接
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
+            family, sockaddr = _resolve(host, port)
+            
+            # 创建非阻塞socket，通过 select 等待连接完成
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.setblocking(False)
             
             # 尝试连接
-            sock.connect((host, port))
-            end_time = time.time()
+            start_time = time.monotonic_ns()
+            err = sock.connect_ex(sockaddr)
+            if err not in _CONNECT_PENDING:
+                raise OSError(err, os.strerror(err))
+            
+            _, writable, in_error = select.select([], [sock], [sock], timeout)
+            end_time = time.monotonic_ns()
+            if not writable and not in_error:
+                raise socket.timeout()
+            
+            err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if err == errno.ECONNREFUSED:
+                raise ConnectionRefusedError(err, os.strerror(err))
+            if err:
+                raise OSError(err, os.strerror(err))
             
             result['success'] = True
-            result['latency'] = (end_time - start_time) * 1000  # 转换为毫秒
-            sock.close()
+            result['latency'] = (end_time - start_time) / 1e6  # 转换为毫秒
+            
+            if self.probe_mode == 'abortive':
+                # 关闭时直接发送RST，立即释放连接四元组
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
             
         except socket.timeout:
             result['error'] = '连接超时'
@@ -85,10 +395,18 @@ class NetworkMonitor:
             result['error'] = '连接被拒绝'
         except Exception as e:
             result['error'] = str(e)
+        finally:
+            if sock is not None:
+                sock.close()
+        
+        # 探测失败时丢弃缓存的地址，下次重新解析
+        if not result['success']:
+            _addr_cache.pop((host, port), None)
         
         return result
     
-    def test_connection(self, host: str, port: int = 80, count: int = 5) -> Dict:
+    def test_connection(self, host: str, port: int = 80, count: int = 5,
+                        timeout: float = 5.0, spacing: float = 0.0) -> Dict:
         """
         执行多次连接测试
         
@@ -96,27 +414,33 @@ class NetworkMonitor:
             host: 目标主机
             port: 端口号
             count: 测试次数
+            timeout: 单次连接超时时间
+            spacing: 相邻两次测试的间隔 (秒)，为0时并发执行所有测试
             
         Returns:
             测试统计结果
         """
-        results = []
         successful_pings = []
         
         print(f"🔍 测试连接到 {host}:{port}")
         
-        for i in range(count):
-            result = self.ping_host(host, port)
-            results.append(result)
-            
-            if result['success']:
-                successful_pings.append(result['latency'])
-                print(f"  {i+1}/{count}: ✅ {result['latency']:.2f}ms")
-            else:
-                print(f"  {i+1}/{count}: ❌ {result['error']}")
-            
-            if i < count - 1:  # 不是最后一次
-                time.sleep(1)
+        def probe(i: int) -> Dict:
+            if spacing > 0 and i:
+                time.sleep(spacing)
+            return self.ping_host(host, port, timeout)
+        
+        # 各次探测相互独立且大部分时间在等待网络，未指定间隔时并发执行
+        workers = 1 if spacing > 0 else max(1, min(count, 32))
+        results = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, result in enumerate(executor.map(probe, range(count))):
+                results.append(result)
+                
+                if result['success']:
+                    successful_pings.append(result['latency'])
+                    print(f"  {i+1}/{count}: ✅ {result['latency']:.2f}ms")
+                else:
+                    print(f"  {i+1}/{count}: ❌ {result['error']}")
         
         # 计算统计信息
         stats = {
@@ -143,7 +467,7 @@ class NetworkMonitor:
         
         interfaces = []
         net_io = psutil.net_io_counters(pernic=True)
-        net_addrs = psutil.net_if_addrs()
+        net_addrs = self._get_if_addrs()
         
         for interface_name, addrs in net_addrs.items():
             interface_info = {
@@ -164,6 +488,15 @@ class NetworkMonitor:
         
         return interfaces
     
+    def _get_if_addrs(self) -> Dict:
+        """获取网卡地址列表，结果缓存 _IF_ADDRS_TTL 秒"""
+        expiry, net_addrs = self._if_addrs_cache
+        now = time.monotonic()
+        if net_addrs is None or now >= expiry:
+            net_addrs = psutil.net_if_addrs()
+            self._if_addrs_cache = (now + _IF_ADDRS_TTL, net_addrs)
+        return net_addrs
+    
     def monitor_bandwidth(self, duration: int = 60, interval: float = 1.0) -> List[Dict]:
         """
         监控带宽使用情况
@@ -175,46 +508,66 @@ class NetworkMonitor:
         Returns:
             带宽使用记录列表
         """
-        if not HAS_PSUTIL:
+        if not HAS_PSUTIL and self._netdev_fd is None:
             print("⚠️  psutil未安装，无法监控带宽")
             return []
         
         print(f"📊 开始监控带宽使用 ({duration}秒, 间隔{interval}秒)")
         
         bandwidth_stats = []
-        start_time = time.time()
-        last_io = psutil.net_io_counters()
+        out = _LineBuffer(interval)
         
-        while time.time() - start_time < duration:
-            time.sleep(interval)
-            
-            current_io = psutil.net_io_counters()
-            elapsed = interval
-            
-            # 计算速率
-            bytes_sent = current_io.bytes_sent - last_io.bytes_sent
-            bytes_recv = current_io.bytes_recv - last_io.bytes_recv
-            
-            sent_rate = bytes_sent / elapsed
-            recv_rate = bytes_recv / elapsed
-            
-            stat = {
-                'timestamp': datetime.now().isoformat(),
-                'bytes_sent': bytes_sent,
-                'bytes_recv': bytes_recv,
-                'sent_rate_bps': sent_rate,
-                'recv_rate_bps': recv_rate,
-                'sent_rate_mbps': sent_rate * 8 / 1_000_000,  # 转换为Mbps
-                'recv_rate_mbps': recv_rate * 8 / 1_000_000
-            }
+        # 清掉之前残留的停止信号
+        try:
+            while self._wakeup_r.recv(64):
+                pass
+        except OSError:
+            pass
+        
+        with selectors.DefaultSelector() as sel:
+            sel.register(self._wakeup_r, selectors.EVENT_READ)
             
-            bandwidth_stats.append(stat)
-            last_io = current_io
+            start_time = last_time = time.monotonic()
+            last_sent, last_recv = self._read_net_totals()
             
-            # 显示实时信息
-            print(f"  📤 发送: {stat['sent_rate_mbps']:.2f} Mbps, "
-                  f"📥 接收: {stat['recv_rate_mbps']:.2f} Mbps")
+            tick = 0
+            while tick * interval < duration:
+                # 按 start + n*interval 计算采样时间点，采样本身的耗时不会累积漂移
+                tick += 1
+                remaining = start_time + tick * interval - time.monotonic()
+                if remaining > 0 and sel.select(remaining):
+                    break
+                
+                current_sent, current_recv = self._read_net_totals()
+                now = time.monotonic()
+                elapsed = now - last_time
+                last_time = now
+                
+                # 计算速率（按实际间隔，避免调度延迟影响结果）
+                bytes_sent = current_sent - last_sent
+                bytes_recv = current_recv - last_recv
+                
+                sent_rate = bytes_sent / elapsed
+                recv_rate = bytes_recv / elapsed
+                
+                stat = {
+                    'timestamp': datetime.now().isoformat(),
+                    'bytes_sent': bytes_sent,
+                    'bytes_recv': bytes_recv,
+                    'sent_rate_bps': sent_rate,
+                    'recv_rate_bps': recv_rate,
+                    'sent_rate_mbps': sent_rate * 8 / 1_000_000,  # 转换为Mbps
+                    'recv_rate_mbps': recv_rate * 8 / 1_000_000
+                }
+                
+                bandwidth_stats.append(stat)
+                last_sent, last_recv = current_sent, current_recv
+                
+                # 显示实时信息
+                out.write(f"  📤 发送: {stat['sent_rate_mbps']:.2f} Mbps, "
+                          f"📥 接收: {stat['recv_rate_mbps']:.2f} Mbps")
         
+        out.flush()
         return bandwidth_stats
     
     def continuous_monitoring(self, target: str, port: int = 80, 
@@ -236,19 +589,20 @@ class NetworkMonitor:
         
         start_time = time.time()
         test_count = 0
+        out = _LineBuffer(interval)
         
         try:
             while True:
                 test_count += 1
-                current_time = datetime.now().strftime('%H:%M:%S')
                 
                 result = self.ping_host(target, port)
                 self.stats['ping_results'].append(result)
+                current_time = time.strftime('%H:%M:%S', time.localtime(result['timestamp'] // 1_000_000_000))
                 
                 if result['success']:
-                    print(f"[{current_time}] #{test_count}: ✅ {result['latency']:.2f}ms")
+                    out.write(f"[{current_time}] #{test_count}: ✅ {result['latency']:.2f}ms")
                 else:
-                    print(f"[{current_time}] #{test_count}: ❌ {result['error']}")
+                    out.write(f"[{current_time}] #{test_count}: ❌ {result['error']}")
                 
                 # 检查是否达到监控时长
                 if duration and (time.time() - start_time) >= duration:
@@ -257,83 +611,130 @@ class NetworkMonitor:
                 time.sleep(interval)
                 
         except KeyboardInterrupt:
+            out.flush()
             print("\n⚠️  监控被用户中断")
         
+        out.flush()
         # 生成统计报告
         self.print_monitoring_summary()
     
     def print_monitoring_summary(self):
         """打印监控摘要"""
-        if not self.stats['ping_results']:
+        ping_results = self.stats['ping_results']
+        if not ping_results:
             print("❌ 没有监控数据")
             return
         
-        successful_pings = [r for r in self.stats['ping_results'] if r['success']]
-        failed_pings = [r for r in self.stats['ping_results'] if not r['success']]
+        total = len(ping_results)
+        successful, avg, std, low, high = ping_results.latency_stats()
         
-        if successful_pings:
-            latencies = [r['latency'] for r in successful_pings]
+        if successful:
             print(f"\n📊 监控摘要:")
-            print(f"  总测试次数: {len(self.stats['ping_results'])}")
-            print(f"  成功次数: {len(successful_pings)}")
-            print(f"  失败次数: {len(failed_pings)}")
-            print(f"  成功率: {len(successful_pings) / len(self.stats['ping_results']) * 100:.1f}%")
-            print(f"  平均延迟: {statistics.mean(latencies):.2f}ms")
-            print(f"  最小延迟: {min(latencies):.2f}ms")
-            print(f"  最大延迟: {max(latencies):.2f}ms")
-            if len(latencies) > 1:
-                print(f"  延迟标准差: {statistics.stdev(latencies):.2f}ms")
-        
-        if failed_pings:
-            error_counts = {}
-            for ping in failed_pings:
-                error = ping['error']
-                error_counts[error] = error_counts.get(error, 0) + 1
-            
+            print(f"  总测试次数: {total}")
+            print(f"  成功次数: {successful}")
+            print(f"  失败次数: {total - successful}")
+            print(f"  成功率: {successful / total * 100:.1f}%")
+            print(f"  平均延迟: {avg:.2f}ms")
+            print(f"  最小延迟: {low:.2f}ms")
+            print(f"  最大延迟: {high:.2f}ms")
+            if successful > 1:
+                print(f"  延迟标准差: {std:.2f}ms")
+        
+        error_counts = ping_results.error_counts()
+        if error_counts:
             print(f"\n❌ 失败原因统计:")
             for error, count in error_counts.items():
                 print(f"  {error}: {count}次")
     
     def generate_report(self, output_file: str = None) -> Dict:
-        """生成监控报告"""
+        """
+        生成监控报告
+        
+        安装了 orjson 且写入文件时，ping_results 逐条编码写出，不在内存中构造全部记录；
+        返回的报告中 ping_results 始终为列表
+        """
         report = {
             'monitor_info': {
                 'start_time': self.stats['start_time'].isoformat(),
                 'end_time': datetime.now().isoformat(),
                 'total_duration': (datetime.now() - self.stats['start_time']).total_seconds()
             },
-            'ping_results': self.stats['ping_results'],
-            'connection_tests': self.stats['connection_tests'],
+            'ping_results': self.stats['ping_results'].iter_dicts(),
+            'connection_tests': [
+                dict(test, results=[dict(r, timestamp=_format_timestamp(r['timestamp']))
+                                    for r in test['results']])
+                for test in self.stats['connection_tests']
+            ],
             'bandwidth_stats': self.stats['bandwidth_stats'],
             'summary': {}
         }
         
         # 计算摘要统计
-        if self.stats['ping_results']:
-            successful_pings = [r for r in self.stats['ping_results'] if r['success']]
-            if successful_pings:
-                latencies = [r['latency'] for r in successful_pings]
+        ping_results = self.stats['ping_results']
+        if ping_results:
+            total = len(ping_results)
+            successful, avg, std, low, high = ping_results.latency_stats()
+            if successful:
                 report['summary'] = {
-                    'total_pings': len(self.stats['ping_results']),
-                    'successful_pings': len(successful_pings),
-                    'failed_pings': len(self.stats['ping_results']) - len(successful_pings),
-                    'success_rate': len(successful_pings) / len(self.stats['ping_results']) * 100,
-                    'avg_latency': statistics.mean(latencies),
-                    'min_latency': min(latencies),
-                    'max_latency': max(latencies),
-                    'std_latency': statistics.stdev(latencies) if len(latencies) > 1 else 0
+                    'total_pings': total,
+                    'successful_pings': int(successful),
+                    'failed_pings': total - int(successful),
+                    'success_rate': successful / total * 100,
+                    'avg_latency': float(avg),
+                    'min_latency': float(low),
+                    'max_latency': float(high),
+                    'std_latency': float(std) if successful > 1 else 0
                 }
         
+        streaming = bool(output_file) and HAS_ORJSON
+        if not streaming:
+            report['ping_results'] = list(report['ping_results'])
+        
         if output_file:
             try:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(report, f, indent=2, ensure_ascii=False)
+                if streaming:
+                    self._stream_report(output_file, report)
+                else:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        json.dump(report, f, indent=2, ensure_ascii=False)
                 print(f"📄 报告已保存到: {output_file}")
             except Exception as e:
                 print(f"❌ 保存报告失败: {e}")
         
+        if streaming:
+            # 写文件时已消耗掉迭代器，文件写完后再为返回值生成列表
+            report['ping_results'] = list(self.stats['ping_results'].iter_dicts())
         return report
     
+    @staticmethod
+    def _stream_report(output_file: str, report: Dict, chunk_size: int = 1024):
+        """
+        用 orjson 分块写出报告：每个顶层字段单独编码，ping_results 从迭代器
+        按批取出、逐条编码写入，不在内存中生成全部记录或整份报告的JSON字符串。
+        输出格式与 json.dump(indent=2) 相同
+        """
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2
+        with open(output_file, 'wb') as f:
+            f.write(b'{')
+            for i, (key, value) in enumerate(report.items()):
+                f.write(b',\n  ' if i else b'\n  ')
+                f.write(orjson.dumps(key) + b': ')
+                if key != 'ping_results':
+                    f.write(orjson.dumps(value, option=option).replace(b'\n', b'\n  '))
+                    continue
+                
+                records = iter(value)
+                sep = b'[\n    '
+                while True:
+                    chunk = list(islice(records, chunk_size))
+                    if not chunk:
+                        break
+                    f.write(sep + b',\n    '.join(orjson.dumps(r, option=option).replace(b'\n', b'\n    ')
+                                                   for r in chunk))
+                    sep = b',\n    '
+                f.write(b'[]' if sep == b'[\n    ' else b'\n  ]')
+            f.write(b'\n}')
+    
     @staticmethod
     def format_bandwidth(bytes_per_sec: float) -> str:
         """格式化带宽显示"""
@@ -378,6 +779,8 @@ def main():
     parser.add_argument('--test', action='store_true', help='执行连接测试')
     parser.add_argument('--count', type=int, default=5, help='测试次数 (默认: 5)')
     parser.add_argument('--timeout', type=float, default=5.0, help='超时时间 (默认: 5秒)')
+    parser.add_argument('--spacing', type=float, default=0.0,
+                        help='连接测试之间的间隔 (默认: 0，并发执行)')
     
     # 监控选项
     parser.add_argument('--monitor', action='store_true', help='持续监控连接')
@@ -394,8 +797,8 @@ def main():
     
     args = parser.parse_args()
     
-    # 创建网络监控器
-    monitor = NetworkMonitor()
+    # 创建网络监控器（持续监控时以RST关闭探测连接，避免 TIME_WAIT 堆积）
+    monitor = NetworkMonitor(probe_mode='abortive' if args.monitor else 'graceful')
     
     try:
         if args.interfaces:
@@ -439,7 +842,8 @@ def main():
         elif args.target:
             if args.test:
                 # 执行连接测试
-                test_stats = monitor.test_connection(args.target, args.port, args.count)
+                test_stats = monitor.test_connection(args.target, args.port, args.count,
+                                                     args.timeout, args.spacing)
                 monitor.stats['connection_tests'].append(test_stats)
                 
                 print(f"\n📊 测试结果摘要:")
@@ -477,6 +881,8 @@ def main():
     except Exception as e:
         print(f"❌ 操作失败: {e}")
         sys.exit(1)
+    finally:
+        monitor.close()
 
 
 if __name__ == "__main__":
@@ -3,16 +3,21 @@
 端口扫描器
 
 功能：
-- 多线程端口扫描
+- 单线程 selectors 并发端口扫描
 - 支持端口范围、常用端口
 - 简单服务识别
+- 区分关闭（RST）与被过滤（超时）的端口
 
 作者: ToolCollection
 """
 import argparse
-import sys
+import errno
+import selectors
 import socket
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import struct
+import sys
+import time
+from collections import deque
 
 COMMON_PORTS = {
     21: 'FTP', 22: 'SSH', 23: 'Telnet', 25: 'SMTP', 53: 'DNS', 80: 'HTTP', 110: 'POP3',
@@ -20,54 +25,179 @@ COMMON_PORTS = {
     8080: 'HTTP-Alt', 27017: 'MongoDB', 1521: 'Oracle', 5900: 'VNC', 8000: 'HTTP-Dev'
 }
 
-def scan_port(host, port, timeout=1):
+# 非阻塞 connect 正在进行中的返回码（Windows 下为 WSAEWOULDBLOCK）
+CONNECT_PENDING = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+                   getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+# 关闭时直接发送RST，不在本机留下 TIME_WAIT 占用临时端口
+_LINGER_ABORT = struct.pack('ii', 1, 0)
+
+# 端口状态：收到RST为关闭，超时或网络不可达视为被过滤（防火墙丢弃）
+OPEN, CLOSED, FILTERED = 'open', 'closed', 'filtered'
+_REFUSED = {errno.ECONNREFUSED, getattr(errno, 'WSAECONNREFUSED', errno.ECONNREFUSED)}
+
+def port_state(err):
+    """根据 connect 的错误码判断端口状态"""
+    if err == 0:
+        return OPEN
+    if err in _REFUSED:
+        return CLOSED
+    return FILTERED
+
+def ephemeral_port_count():
+    """本机可用临时端口数量，无法获取时返回 None"""
+    try:
+        with open('/proc/sys/net/ipv4/ip_local_port_range') as f:
+            low, high = map(int, f.read().split())
+        return high - low + 1
+    except (OSError, ValueError):
+        return None
+
+def resolve_host(host):
+    """只解析一次目标主机，返回 (地址族, IP)，扫描各端口时不再重复查询DNS"""
+    # 与原先的 AF_INET 扫描保持一致只取IPv4地址，避免优先返回的IPv6地址不可达
+    family, _, _, _, sockaddr = socket.getaddrinfo(
+        host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)[0]
+    return family, sockaddr[0]
+
+def open_probe(ip, port, family=socket.AF_INET):
+    """创建非阻塞socket并发起连接，返回 (socket, connect_ex 返回码)"""
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+    sock.setblocking(False)
     try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return port, True
-    except Exception:
-        return port, False
+        return sock, sock.connect_ex((ip, port))
+    except (OSError, OverflowError):
+        sock.close()
+        raise
+
+def scan_ports(ip, ports, timeout=1, max_inflight=256, family=socket.AF_INET):
+    """
+    单线程 selectors 扫描：同时保持最多 max_inflight 个非阻塞连接，
+    按完成顺序逐个产出 (port, 状态)。ip 应为已解析的地址。
+    ports 按需迭代，内存占用只与 max_inflight 相关
+    """
+    sel = selectors.DefaultSelector()
+    inflight = {}  # port -> socket
+    # (超时时间, port, socket)；超时时间相同，按发起顺序即有序
+    deadlines = deque()
+    ports_iter = iter(ports)
+    exhausted = False
+
+    def finish(port):
+        sock = inflight.pop(port)
+        sel.unregister(sock)
+        sock.close()
+
+    try:
+        while True:
+            # 补充新的连接直到达到并发上限
+            while not exhausted and len(inflight) < max_inflight:
+                port = next(ports_iter, None)
+                if port is None:
+                    exhausted = True
+                    break
+                try:
+                    sock, err = open_probe(ip, port, family)
+                except OSError as e:
+                    yield port, port_state(e.errno)
+                    continue
+                except OverflowError:
+                    # 端口超出 0-65535，connect_ex 直接抛 OverflowError，按关闭处理
+                    yield port, CLOSED
+                    continue
+                if err in CONNECT_PENDING:
+                    inflight[port] = sock
+                    sel.register(sock, selectors.EVENT_WRITE, port)
+                    deadlines.append((time.monotonic() + timeout, port, sock))
+                else:
+                    sock.close()
+                    yield port, port_state(err)
+            if not inflight:
+                break
+
+            # 已完成的连接会在队列中留下过期条目：队首直接丢弃，积累过多时整体清理
+            while inflight.get(deadlines[0][1]) is not deadlines[0][2]:
+                deadlines.popleft()
+            if len(deadlines) > 2 * max_inflight:
+                deadlines = deque(d for d in deadlines if inflight.get(d[1]) is d[2])
+
+            wait = max(0.0, deadlines[0][0] - time.monotonic())
+            for key, _ in sel.select(wait):
+                port = key.data
+                err = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                finish(port)
+                yield port, port_state(err)
+
+            # 处理超时的连接
+            now = time.monotonic()
+            while deadlines and deadlines[0][0] <= now:
+                _, port, sock = deadlines.popleft()
+                if inflight.get(port) is sock:
+                    finish(port)
+                    yield port, FILTERED
+    finally:
+        for sock in inflight.values():
+            sock.close()
+        sel.close()
 
 def main():
     parser = argparse.ArgumentParser(
-        description="端口扫描器 - 多线程端口扫描，支持端口范围、服务识别",
+        description="端口扫描器 - 非阻塞并发端口扫描，支持端口范围、服务识别",
         epilog="""
 示例：
   # 扫描常用端口
   python port_scanner.py example.com
   # 扫描端口范围
   python port_scanner.py example.com --ports 1-1024
-  # 指定超时和线程数
+  # 指定超时和并发连接数
   python port_scanner.py example.com --ports 20-100 --timeout 2 --threads 50
+  # 同时列出被防火墙过滤的端口
+  python port_scanner.py example.com --ports 1-1024 --show-filtered
         """
     )
     parser.add_argument('host', help='目标主机')
     parser.add_argument('--ports', help='端口范围，如1-1000，默认常用端口')
     parser.add_argument('--timeout', type=float, default=1.0, help='超时时间（秒）')
-    parser.add_argument('--threads', type=int, default=50, help='并发线程数')
+    parser.add_argument('--threads', type=int, default=256, help='最大并发连接数')
+    parser.add_argument('--show-filtered', action='store_true', help='显示被过滤（超时无响应）的端口')
     args = parser.parse_args()
 
     if args.ports:
         if '-' in args.ports:
             start, end = map(int, args.ports.split('-'))
-            ports = list(range(start, end+1))
+            ports = range(start, end+1)
         else:
-            ports = [int(p) for p in args.ports.split(',')]
+            ports = list(dict.fromkeys(int(p) for p in args.ports.split(',')))
     else:
         ports = list(COMMON_PORTS.keys())
 
-    print(f'开始扫描 {args.host} 的 {len(ports)} 个端口...')
+    try:
+        family, ip = resolve_host(args.host)
+    except socket.gaierror as e:
+        print(f'无法解析主机 {args.host}: {e}')
+        sys.exit(1)
+
+    print(f'开始扫描 {args.host} ({ip}) 的 {len(ports)} 个端口...')
     open_ports = []
-    with ThreadPoolExecutor(max_workers=args.threads) as executor:
-        future_to_port = {executor.submit(scan_port, args.host, port, args.timeout): port for port in ports}
-        for future in as_completed(future_to_port):
-            port, ok = future.result()
-            if ok:
-                service = COMMON_PORTS.get(port, '')
-                print(f'✅ 端口 {port} 开放 {service}')
-                open_ports.append(port)
-            else:
-                pass  # 可选：print(f'❌ 端口 {port} 关闭')
-    print(f'扫描完成，开放端口 {len(open_ports)}/{len(ports)}')
+    counts = {OPEN: 0, CLOSED: 0, FILTERED: 0}
+    # Windows 的 select 最多支持 512 个socket
+    max_inflight = min(args.threads, 500) if sys.platform == 'win32' else args.threads
+    # 同时进行的连接不超过临时端口数量的一半，避免端口耗尽导致误判为关闭
+    ephemeral = ephemeral_port_count()
+    if ephemeral:
+        max_inflight = min(max_inflight, ephemeral // 2)
+    for port, state in scan_ports(ip, ports, args.timeout, max(1, max_inflight), family):
+        counts[state] += 1
+        if state == OPEN:
+            service = COMMON_PORTS.get(port, '')
+            print(f'✅ 端口 {port} 开放 {service}')
+            open_ports.append(port)
+        elif args.show_filtered and state == FILTERED:
+            print(f'🛡️  端口 {port} 被过滤（无响应）')
+    print(f'扫描完成，开放端口 {len(open_ports)}/{len(ports)}，'
+          f'关闭 {counts[CLOSED]}，被过滤 {counts[FILTERED]}')
     if open_ports:
         print('开放端口列表:', ', '.join(map(str, sorted(open_ports))))
 
@@ -6,28 +6,230 @@
 - 批量检测HTTP/HTTPS代理可用性
 - 支持代理列表文件
 - 支持超时设置，输出可用代理
+- 默认通过 CONNECT 隧道请求探测，无需访问第三方检测站点
+- HTTP 代理直接使用 http.client 检测，仅 socks/https 代理依赖 requests
+- 基于 asyncio 单线程高并发检测
 
 作者: ToolCollection
 """
 import argparse
+import asyncio
+import base64
+import errno
+import http.client
+import select
+import socket
 import sys
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from functools import partial
+from urllib.parse import unquote, urlsplit
+from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
 
-def check_proxy(proxy, timeout=5):
+CHECK_URL = 'https://httpbin.org/ip'
+_CHECK = urlsplit(CHECK_URL)
+# CONNECT / GET 探测使用的目标，只需代理返回状态行，不与目标站建立TLS
+PROBE_HOST = 'example.com'
+
+# 非阻塞 connect 正在进行中的返回码（Windows 下为 WSAEWOULDBLOCK）
+_CONNECT_PENDING = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY,
+                    getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+_local = threading.local()
+
+
+def _get_session():
+    """每个线程复用一个Session，保持到同一代理的keep-alive连接"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        # 只有 socks / https 代理需要 requests，按需导入
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
+def _open_connection(host, port, timeout):
+    """非阻塞 connect + select 建立TCP连接，超时抛出 socket.timeout"""
+    family, _, _, _, sockaddr = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setblocking(False)
+        err = sock.connect_ex(sockaddr)
+        if err not in _CONNECT_PENDING:
+            raise OSError(err, 'connect failed')
+        _, writable, in_error = select.select([], [sock], [sock], timeout)
+        if not writable and not in_error:
+            raise socket.timeout('connect timed out')
+        err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if err:
+            raise OSError(err, 'connect failed')
+        return sock
+    except Exception:
+        sock.close()
+        raise
+
+def _proxy_auth(parts):
+    """代理地址中包含用户名密码时返回 Proxy-Authorization 头的值"""
+    if not parts.username:
+        return None
+    credentials = f'{unquote(parts.username)}:{unquote(parts.password or "")}'
+    return f'Basic {base64.b64encode(credentials.encode()).decode()}'
+
+def _build_probe(proxy, method):
+    """解析代理地址并构造探测请求，返回 (host, port, 请求字节)"""
+    parts = urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+    # 缺少主机名时 open_connection 会连到本机，必须按格式错误处理
+    if not parts.hostname:
+        raise ValueError(f'代理地址缺少主机名: {proxy}')
+    if method == 'connect':
+        request = f'CONNECT {PROBE_HOST}:443 HTTP/1.1\r\nHost: {PROBE_HOST}:443\r\n'
+    else:
+        request = f'GET http://{PROBE_HOST}/ HTTP/1.0\r\nHost: {PROBE_HOST}\r\n'
+    auth = _proxy_auth(parts)
+    if auth:
+        request += f'Proxy-Authorization: {auth}\r\n'
+    request += '\r\n'
+    return parts.hostname, parts.port or 80, request.encode('latin-1')
+
+def _status_ok(status_line, method):
+    """检查代理返回的状态行"""
+    fields = status_line.split(None, 2)
+    if len(fields) < 2 or not fields[0].startswith(b'HTTP/') or not fields[1].isdigit():
+        return False
+    status = int(fields[1])
+    return status == 200 if method == 'connect' else status < 400
+
+def _use_probe(proxy, method):
+    # socks、https 代理无法直接用明文探测，走完整的HTTP请求检查
+    scheme = proxy.split('://', 1)[0].lower() if '://' in proxy else 'http'
+    return method != 'http' and scheme == 'http'
+
+def probe_proxy(proxy, timeout=5, method='connect'):
+    """
+    直接通过socket探测HTTP代理：
+    connect 发送 CONNECT 隧道请求并要求返回200，
+    get 发送普通的代理 GET 请求并要求返回非错误状态码
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        host, port, request = _build_probe(proxy, method)
+        with _open_connection(host, port, timeout) as sock:
+            sock.settimeout(max(0.001, deadline - time.monotonic()))
+            sock.sendall(request)
+            status_line = sock.makefile('rb').readline(256)
+    except (OSError, ValueError):
+        return proxy, False
+    return proxy, _status_ok(status_line, method)
+
+async def probe_proxy_async(proxy, timeout=5, method='connect'):
+    """probe_proxy 的 asyncio 版本"""
+    writer = None
+
+    async def exchange(host, port, request):
+        nonlocal writer
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(request)
+        await writer.drain()
+        return await reader.readline()
+
+    try:
+        status_line = await asyncio.wait_for(exchange(*_build_probe(proxy, method)), timeout)
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return proxy, False
+    finally:
+        if writer is not None:
+            writer.close()
+    return proxy, _status_ok(status_line, method)
+
+def check_via_tunnel(proxy, timeout=5):
+    """通过 http.client 建立 CONNECT 隧道请求检测地址，验证代理能完成HTTPS请求"""
+    conn = None
+    try:
+        # 代理列表中格式错误的行（端口非数字、缺少主机名）按检测失败处理
+        parts = urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+        if not parts.hostname:
+            return proxy, False
+        auth = _proxy_auth(parts)
+        conn = http.client.HTTPSConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        conn.set_tunnel(_CHECK.hostname, _CHECK.port or 443,
+                        headers={'Proxy-Authorization': auth} if auth else None)
+        conn.request('GET', _CHECK.path or '/')
+        return proxy, conn.getresponse().status == 200
+    except (OSError, http.client.HTTPException, ValueError):
+        return proxy, False
+    finally:
+        if conn is not None:
+            conn.close()
+
+def check_proxy(proxy, timeout=5, connect_timeout=None, method='connect'):
+    if _use_probe(proxy, method):
+        return probe_proxy(proxy, timeout, method)
+    if '://' not in proxy or proxy.lower().startswith('http://'):
+        return check_via_tunnel(proxy, timeout)
+
+    # socks、https 代理交给 requests 处理
     proxies = {
         'http': proxy,
         'https': proxy
     }
+    # 连接阶段单独限时，避免不可达代理占满整个超时
+    connect_timeout = min(timeout, 3) if connect_timeout is None else connect_timeout
     try:
-        r = requests.get('https://httpbin.org/ip', proxies=proxies, timeout=timeout)
-        if r.status_code == 200:
-            return proxy, True
+        # 只需要状态码，stream=True 不读取响应体
+        with _get_session().get(CHECK_URL, proxies=proxies,
+                                timeout=(connect_timeout, timeout), stream=True) as r:
+            if r.status_code == 200:
+                return proxy, True
     except Exception:
         pass
     return proxy, False
 
+async def check_proxy_async(proxy, timeout=5, method='connect', session=None, executor=None):
+    """
+    异步检测单个代理：明文探测直接在事件循环中完成，
+    http 方式优先使用 aiohttp，其余情况（socks代理、未安装aiohttp）交给线程池
+    """
+    if _use_probe(proxy, method):
+        return await probe_proxy_async(proxy, timeout, method)
+    if session is not None and proxy.lower().startswith('http://'):
+        try:
+            async with session.get(CHECK_URL, proxy=proxy,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+                return proxy, r.status == 200
+        except Exception:
+            return proxy, False
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(check_proxy, proxy, timeout, method=method))
+
+async def check_proxies_async(proxies, timeout=5, method='connect', concurrency=100):
+    """单线程并发检测代理，按完成顺序逐个产出 (proxy, 是否可用)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    session = None
+    if HAS_AIOHTTP and method == 'http':
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency, ssl=False))
+
+    async def bounded(proxy):
+        async with semaphore:
+            return await check_proxy_async(proxy, timeout, method, session, executor)
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, 32)) as executor:
+        try:
+            for coro in asyncio.as_completed([bounded(p) for p in proxies]):
+                yield await coro
+        finally:
+            if session is not None:
+                await session.close()
+
 def main():
     parser = argparse.ArgumentParser(
         description="代理检测器 - 批量检测HTTP/HTTPS代理可用性",
@@ -37,12 +239,16 @@ def main():
   python proxy_checker.py http://127.0.0.1:8080
   # 检查代理列表
   python proxy_checker.py --file proxies.txt
+  # 通过完整的HTTPS请求检查
+  python proxy_checker.py --file proxies.txt --method http
         """
     )
     parser.add_argument('proxy', nargs='?', help='代理地址（如 http://ip:port）')
     parser.add_argument('--file', help='代理列表文件，每行一个')
     parser.add_argument('--timeout', type=int, default=5, help='超时时间（秒）')
-    parser.add_argument('--threads', type=int, default=10, help='并发线程数')
+    parser.add_argument('--threads', type=int, default=100, help='并发检测数')
+    parser.add_argument('--method', choices=['connect', 'get', 'http'], default='connect',
+                        help='检测方式：connect 隧道请求（默认）、get 代理GET请求、http 完整HTTPS请求')
     args = parser.parse_args()
 
     proxies = []
@@ -57,15 +263,16 @@ def main():
 
     print(f'开始检测 {len(proxies)} 个代理...')
     available = []
-    with ThreadPoolExecutor(max_workers=args.threads) as executor:
-        future_to_proxy = {executor.submit(check_proxy, p, args.timeout): p for p in proxies}
-        for future in as_completed(future_to_proxy):
-            proxy, ok = future.result()
+
+    async def run():
+        async for proxy, ok in check_proxies_async(proxies, args.timeout, args.method, max(1, args.threads)):
             if ok:
                 print(f'✅ 可用: {proxy}')
                 available.append(proxy)
             else:
                 print(f'❌ 不可用: {proxy}')
+
+    asyncio.run(run())
     print(f'检测完成，可用代理 {len(available)}/{len(proxies)}')
     if available:
         with open('available_proxies.txt', 'w', encoding='utf-8') as f:
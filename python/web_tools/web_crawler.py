@@ -15,42 +15,362 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+import asyncio
+import codecs
 import json
 import csv
 import argparse
+import re
 import sys
+import threading
+from collections import OrderedDict
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 import logging
 import time
-from urllib.parse import urljoin, urlparse
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunsplit
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from bs4 import BeautifulSoup
+    import soupsieve
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+    HAS_CHARSET_NORMALIZER = True
+except ImportError:
+    HAS_CHARSET_NORMALIZER = False
+
+# 页面树：安装了 lxml 时为 lxml.html 文档（解析与CSS匹配都在C中完成），
+# 否则回退为 BeautifulSoup + html.parser
+HtmlTree = Any
+
+_ATTR_NAME_RE = re.compile(r'\[([^\]]+)\]')
+_SIMPLE_SELECTOR_RE = re.compile(r'([a-zA-Z][\w-]*)(?:\[([\w-]+)\])?')
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.I)
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
+_parsers = threading.local()
+
+
+def _html_parser(encoding: Optional[str]):
+    """按编码复用 lxml 解析器（解析器不能跨线程共享，每个线程各自缓存）"""
+    cache = getattr(_parsers, 'cache', None)
+    if cache is None:
+        cache = _parsers.cache = {}
+    parser = cache.get(encoding)
+    if parser is None:
+        parser = cache[encoding] = lxml.html.HTMLParser(encoding=encoding)
+    return parser
+
+
+def _detect_encoding(content: bytes, content_type: str) -> Optional[str]:
+    """
+    确定页面编码：优先使用响应头声明的 charset；页面内有 meta charset 时
+    交给 lxml 自行识别（返回 None）；都没有时，内容是合法 UTF-8 就按 UTF-8 处理，
+    否则用 charset_normalizer 探测（GBK、Shift-JIS 等未声明编码的旧页面），
+    仍无法确定时返回 None 由 lxml 猜测
+    """
+    match = _CHARSET_RE.search(content_type or '')
+    if match:
+        return match.group(1)
+    sample = content[:65536]
+    if _META_CHARSET_RE.search(sample[:4096]):
+        return None
+    try:
+        # 增量解码器不把样本末尾被截断的多字节字符当作错误
+        codecs.getincrementaldecoder('utf-8')().decode(sample)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if HAS_CHARSET_NORMALIZER:
+        best = detect_charset(sample).best()
+        if best is not None:
+            return best.encoding
+    return None
+
+
+def parse_html_chunks(chunks: Iterable[bytes], content_type: str = '') -> Optional[HtmlTree]:
+    """
+    增量解析HTML：数据块逐个喂给 lxml，解析与网络读取交替进行，
+    无需先把整个响应体拼成一个字节串。内容为空时返回None
+    """
+    chunks = iter(chunks)
+    first = next(chunks, b'')
+    if not HAS_LXML:
+        return BeautifulSoup(first + b''.join(chunks), 'html.parser')
+    try:
+        try:
+            parser = _html_parser(_detect_encoding(first, content_type))
+        except LookupError:
+            # 响应头声明了 libxml2 不认识的编码名，忽略响应头重新探测
+            parser = _html_parser(_detect_encoding(first, ''))
+        try:
+            parser.feed(first)
+            for chunk in chunks:
+                parser.feed(chunk)
+        finally:
+            # close() 同时重置解析器状态，读取中途出错时也要调用，以便线程内复用
+            tree = parser.close()
+        return tree
+    except lxml.etree.LxmlError:
+        return None
+
+
+def parse_html(content: bytes, content_type: str = '') -> Optional[HtmlTree]:
+    """解析HTML字节为页面树，内容为空时返回None"""
+    return parse_html_chunks((content,), content_type)
+
+
+@lru_cache(maxsize=256)
+def _compile_selector(selector: str):
+    """编译CSS选择器并按字符串缓存，同一选择器在多个页面间只解析一次"""
+    if HAS_LXML:
+        return CSSSelector(selector, translator='html')
+    return soupsieve.compile(selector)
+
+
+def _simple_selector(selector: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    解析只由标签名（可带一个属性存在条件）组成的选择器，如 'h1, h2, h3'、'a[href]'，
+    返回 {标签名: 必需属性或None}；其他选择器返回None，交给CSS选择器处理
+    """
+    if not HAS_LXML:
+        return None
+    parts = {}
+    for part in selector.split(','):
+        match = _SIMPLE_SELECTOR_RE.fullmatch(part.strip())
+        if not match:
+            return None
+        tag = match.group(1).lower()
+        if tag in parts:
+            return None
+        required = match.group(2)
+        parts[tag] = required.lower() if required else None
+    return parts
+
+
+def css_select(tree: HtmlTree, selector: str) -> list:
+    """在页面树上执行CSS选择器"""
+    compiled = _compile_selector(selector)
+    if HAS_LXML:
+        return compiled(tree)
+    return compiled.select(tree)
+
+
+def make_links_absolute(tree: HtmlTree, base_url: str) -> HtmlTree:
+    """把页面中的相对链接一次性转换为绝对URL（考虑 <base href>），无法解析的链接保持原样"""
+    if HAS_LXML:
+        tree.resolve_base_href(handle_failures='ignore')
+        tree.make_links_absolute(base_url, resolve_base_href=False, handle_failures='ignore')
+        return tree
+    
+    base = tree.find('base', href=True)
+    if base is not None:
+        base_url = urljoin(base_url, base['href'])
+    for attr in ('href', 'src'):
+        for elem in tree.find_all(attrs={attr: True}):
+            value = elem[attr].strip()
+            if not value.startswith(('http://', 'https://')):
+                try:
+                    elem[attr] = urljoin(base_url, value)
+                except ValueError:
+                    pass
+    return tree
+
+
+def node_text(node) -> str:
+    """元素的文本内容（去除首尾空白）"""
+    if HAS_LXML:
+        return node.text_content().strip()
+    return ' '.join(node.stripped_strings)
+
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# 进程内页面内容缓存（需通过 memo_bytes 启用）：同一URL在有效期内再次抓取时
+# 直接重新解析，不再请求网络
+_MEMO_TTL = 300
+
+# 异步抓取遇到连接错误、超时时的重试次数和退避系数，与同步会话的
+# Retry(total=3, backoff_factor=0.3) 一致：第 n 次重试前等待 0.3 * 2**(n-1) 秒
+_ASYNC_RETRIES = 3
+_ASYNC_BACKOFF = 0.3
+
+
+def _canonical_url(url: str) -> str:
+    """
+    规范化URL用于去重：协议和主机名转小写，去掉默认端口和片段，
+    查询参数排序，去掉路径末尾的 /
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    userinfo, at, host = parts.netloc.rpartition('@')
+    host = host.lower()
+    hostname, colon, port = host.rpartition(':')
+    if colon and ']' not in port and _DEFAULT_PORTS.get(scheme) == port:
+        host = hostname
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, userinfo + at + host, path, query, ''))
+
+
+def _write_json_array(f, items: Iterable[Dict[str, Any]]) -> None:
+    """
+    用 orjson 逐条编码写出JSON数组，输出格式与 json.dump(indent=2) 相同，
+    不需要先把整个结果编码成一个大字符串
+    """
+    sep = b'[\n  '
+    for item in items:
+        f.write(sep)
+        f.write(orjson.dumps(item, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+                .replace(b'\n', b'\n  '))
+        sep = b',\n  '
+    f.write(b'[]' if sep == b'[\n  ' else b'\n]')
+
+
+class _PageCache:
+    """
+    条件请求缓存：记录每个URL的 ETag / Last-Modified 和页面内容，
+    重复抓取时带上校验头，服务器返回 304 就直接使用缓存内容
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.dir = Path(cache_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.dir / 'index.json'
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.index: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+        self.dirty = False
+    
+    def _body_path(self, key: str) -> Path:
+        return self.dir / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.html')
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """生成条件请求头，没有缓存内容时返回空字典"""
+        key = _canonical_url(url)
+        entry = self.index.get(key)
+        if not entry or not self._body_path(key).exists():
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def load(self, url: str) -> Optional[tuple]:
+        """读取缓存的 (页面内容, Content-Type)"""
+        key = _canonical_url(url)
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        try:
+            return self._body_path(key).read_bytes(), entry.get('content_type', '')
+        except OSError:
+            return None
+    
+    def store(self, url: str, headers, content: bytes, content_type: str):
+        """记录新下载页面的校验信息和内容；响应没有 ETag / Last-Modified 时不缓存"""
+        key = _canonical_url(url)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            if self.index.pop(key, None) is not None:
+                self.dirty = True
+            return
+        self._body_path(key).write_bytes(content)
+        self.index[key] = {'etag': etag, 'last_modified': last_modified,
+                           'content_type': content_type}
+        self.dirty = True
+    
+    def save(self):
+        """索引有变化时写回磁盘（先写临时文件再替换，中途中断不会损坏索引）"""
+        if not self.dirty:
+            return
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+        self.dirty = False
+
+
 class WebCrawler:
     """网页爬虫类"""
     
-    def __init__(self, headers: Optional[Dict[str, str]] = None, delay: float = 1.0):
+    def __init__(self, headers: Optional[Dict[str, str]] = None, delay: float = 1.0,
+                 cache_dir: Optional[str] = None, max_bytes: int = 5 * 1024 * 1024,
+                 memo_bytes: int = 0):
         """
         初始化爬虫
         
         Args:
             headers: 自定义请求头
             delay: 请求间隔时间（秒）
+            cache_dir: 条件请求缓存目录，为None时不缓存
+            max_bytes: 单个页面最多读取的字节数（解压后），超出部分丢弃
+            memo_bytes: 进程内页面缓存的总字节数上限，0 表示不缓存
         """
         self.session = requests.Session()
+        # 默认连接池只有10个连接，同一站点多页抓取时会反复握手；
+        # 连接被重置等瞬时错误按指数退避重试
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64,
+                              max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.delay = delay
+        self.max_bytes = max_bytes
+        # 每个主机下一次允许发起请求的时间（time.monotonic），不同主机分别限速
+        self._host_next_ok: Dict[str, float] = {}
+        self.cache = _PageCache(cache_dir) if cache_dir else None
+        # 规范化URL -> (过期时间, 页面内容, Content-Type)，按最近使用排序
+        self.memo_bytes = memo_bytes
+        self._memo: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._memo_total = 0
         
         # 设置默认请求头
         default_headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            # 安装了 brotli / zstandard 时 urllib3 会自动支持 br、zstd，这里只声明能解码的编码
+            'Accept-Encoding': DEFAULT_ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         }
         
@@ -59,7 +379,47 @@ class WebCrawler:
         
         self.session.headers.update(default_headers)
     
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+    def _host_wait_time(self, netloc: str) -> float:
+        """距离该主机下一次允许请求还需等待的秒数"""
+        return max(0.0, self._host_next_ok.get(netloc, 0.0) - time.monotonic())
+    
+    def _mark_host_request(self, netloc: str):
+        """记录对该主机发起了请求，下一次请求至少在 delay 秒之后"""
+        self._host_next_ok[netloc] = time.monotonic() + self.delay
+    
+    def _wait_for_host(self, netloc: str):
+        """按主机限速：同一主机相邻两次请求的开始时间至少间隔 delay 秒"""
+        time.sleep(self._host_wait_time(netloc))
+        self._mark_host_request(netloc)
+    
+    def _memo_get(self, url: str) -> Optional[tuple]:
+        """取出本次运行中已下载且未过期的 (页面内容, Content-Type)"""
+        key = _canonical_url(url)
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._memo[key]
+            self._memo_total -= len(entry[1])
+            return None
+        self._memo.move_to_end(key)
+        return entry[1:]
+    
+    def _memo_put(self, url: str, content: bytes, content_type: str):
+        """记录下载的页面内容，总大小超出 memo_bytes 时淘汰最久未使用的页面"""
+        if len(content) > self.memo_bytes:
+            return
+        key = _canonical_url(url)
+        old = self._memo.pop(key, None)
+        if old is not None:
+            self._memo_total -= len(old[1])
+        self._memo[key] = (time.monotonic() + _MEMO_TTL, content, content_type)
+        self._memo_total += len(content)
+        while self._memo_total > self.memo_bytes:
+            _, evicted = self._memo.popitem(last=False)
+            self._memo_total -= len(evicted[1])
+    
+    def fetch_page(self, url: str) -> Optional[HtmlTree]:
         """
         获取网页内容
         
@@ -67,51 +427,101 @@ class WebCrawler:
             url: 网页URL
             
         Returns:
-            BeautifulSoup对象或None
+            页面树或None
         """
+        memo = self._memo_get(url)
+        if memo is not None:
+            logger.info(f"使用本次运行中已下载的页面: {url}")
+            return self._parse_page(url, *memo)
+        
         try:
+            self._wait_for_host(urlparse(url).netloc)
             logger.info(f"正在抓取: {url}")
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            logger.info(f"成功抓取页面，大小: {len(response.content)} 字节")
-            
-            # 延迟请求
-            time.sleep(self.delay)
+            size = 0
+            truncated = False
+            # 启用了进程内缓存或条件请求缓存时才保留各数据块，解析完成后写入缓存；
+            # 否则解析过程中不持有完整的响应体
+            chunks = [] if self.cache is not None or self.memo_bytes > 0 else None
+
+            def body(response):
+                nonlocal size, truncated
+                for chunk in response.iter_content(chunk_size=65536):
+                    if size + len(chunk) > self.max_bytes:
+                        # 超出大小上限：只解析上限以内的部分，不再继续下载
+                        chunk = chunk[:self.max_bytes - size]
+                        truncated = True
+                    size += len(chunk)
+                    if chunks is not None:
+                        chunks.append(chunk)
+                    yield chunk
+                    if truncated:
+                        logger.warning(f"页面超过 {self.max_bytes} 字节，已截断: {url}")
+                        break
+
+            cache_headers = self.cache.conditional_headers(url) if self.cache is not None else {}
+            with self.session.get(url, timeout=30, stream=True, headers=cache_headers) as response:
+                response.raise_for_status()
+                if response.status_code == 304:
+                    cached = self.cache.load(url) if self.cache is not None else None
+                    if cached is None:
+                        logger.error(f"抓取页面失败 {url}: 服务器返回 304，但没有缓存内容")
+                        return None
+                    logger.info(f"页面未修改，使用缓存: {url}")
+                    tree = parse_html(*cached)
+                    self._memo_put(url, *cached)
+                else:
+                    content_type = response.headers.get('Content-Type', '')
+                    tree = parse_html_chunks(body(response), content_type)
+                    logger.info(f"成功抓取页面，大小: {size} 字节")
+                    if chunks is not None:
+                        content = b''.join(chunks)
+                        self._memo_put(url, content, content_type)
+                        if self.cache is not None and not truncated:
+                            self.cache.store(url, response.headers, content, content_type)
             
-            return soup
+            return self._finish_page(url, tree)
             
         except requests.RequestException as e:
             logger.error(f"抓取页面失败 {url}: {e}")
             return None
     
-    def extract_text(self, soup: BeautifulSoup, selector: str) -> List[str]:
+    def _finish_page(self, url: str, tree: Optional[HtmlTree]) -> Optional[HtmlTree]:
+        """解析后的公共处理：记录无法解析的页面，把相对链接转换为绝对URL"""
+        if tree is None:
+            logger.error(f"页面内容为空或无法解析: {url}")
+            return None
+        return make_links_absolute(tree, url)
+    
+    def _parse_page(self, url: str, content: bytes, content_type: str) -> Optional[HtmlTree]:
+        """解析完整的页面内容"""
+        return self._finish_page(url, parse_html(content, content_type))
+    
+    def extract_text(self, tree: HtmlTree, selector: str) -> List[str]:
         """
         使用CSS选择器提取文本
         
         Args:
-            soup: BeautifulSoup对象
+            tree: 页面树
             selector: CSS选择器
             
         Returns:
             提取的文本列表
         """
-        elements = soup.select(selector)
-        return [elem.get_text(strip=True) for elem in elements]
+        elements = css_select(tree, selector)
+        return [node_text(elem) for elem in elements]
     
-    def extract_links(self, soup: BeautifulSoup, selector: str = 'a[href]') -> List[str]:
+    def extract_links(self, tree: HtmlTree, selector: str = 'a[href]') -> List[str]:
         """
         提取链接
         
         Args:
-            soup: BeautifulSoup对象
+            tree: 页面树
             selector: CSS选择器
             
         Returns:
             链接列表
         """
-        elements = soup.select(selector)
+        elements = css_select(tree, selector)
         links = []
         
         for elem in elements:
@@ -121,20 +531,20 @@ class WebCrawler:
         
         return links
     
-    def extract_attributes(self, soup: BeautifulSoup, selector: str, 
+    def extract_attributes(self, tree: HtmlTree, selector: str, 
                           attributes: List[str]) -> List[Dict[str, str]]:
         """
         提取元素属性
         
         Args:
-            soup: BeautifulSoup对象
+            tree: 页面树
             selector: CSS选择器
             attributes: 要提取的属性列表
             
         Returns:
             属性字典列表
         """
-        elements = soup.select(selector)
+        elements = css_select(tree, selector)
         results = []
         
         for elem in elements:
@@ -159,43 +569,278 @@ class WebCrawler:
         Returns:
             抓取的数据字典
         """
-        soup = self.fetch_page(url)
-        if not soup:
+        data = self._crawl_prepared(url, self._prepare_selectors(selectors))
+        self._save_cache()
+        return data
+    
+    def _save_cache(self):
+        """保存条件请求缓存索引"""
+        if self.cache is not None:
+            try:
+                self.cache.save()
+            except OSError as e:
+                logger.error(f"保存缓存索引失败: {e}")
+    
+    def _prepare_selectors(self, selectors: Dict[str, str]) -> List[tuple]:
+        """
+        预处理选择器配置，多页抓取时只解析一次
+        
+        Returns:
+            [(字段名, 'text'|'attr', CSS选择器, 属性名, 简单选择器的标签表或None)]
+        """
+        plan = []
+        for field, selector in selectors.items():
+            kind, attr_name = 'text', None
+            if selector.startswith('attr:'):
+                selector = selector[5:]  # 去掉 'attr:' 前缀
+                match = _ATTR_NAME_RE.search(selector)
+                if not match:
+                    raise ValueError(f"属性选择器缺少 [属性名]: {selector}")
+                kind, attr_name = 'attr', match.group(1)
+            plan.append((field, kind, selector, attr_name, _simple_selector(selector)))
+        return plan
+    
+    def _crawl_prepared(self, url: str, plan: List[tuple]) -> Dict[str, Any]:
+        """按预处理好的选择器抓取单个页面"""
+        tree = self.fetch_page(url)
+        if tree is None:
             return {}
         
+        return self._extract_fields(url, tree, plan)
+    
+    def _extract_fields(self, url: str, tree: HtmlTree, plan: List[tuple]) -> Dict[str, Any]:
+        """按预处理好的选择器从页面树中提取各字段"""
         data = {'url': url}
+        # 简单选择器按标签名登记，最后合并为一次文档遍历：{标签名: [(结果列表, 必需属性, 提取的属性)]}
+        fused = {}
         
-        for field, selector in selectors.items():
-            if selector.startswith('attr:'):
+        for field, kind, selector, attr_name, parts in plan:
+            if parts is not None:
+                data[field] = []
+                for tag, required in parts.items():
+                    fused.setdefault(tag, []).append((data[field], required, attr_name))
+            elif kind == 'attr':
                 # 提取属性
-                attr_selector = selector[5:]  # 去掉 'attr:' 前缀
-                attr_name = attr_selector.split('[')[1].split(']')[0]
-                elements = soup.select(attr_selector)
+                elements = css_select(tree, selector)
                 data[field] = [elem.get(attr_name) for elem in elements if elem.get(attr_name)]
             else:
                 # 提取文本
-                data[field] = self.extract_text(soup, selector)
+                data[field] = self.extract_text(tree, selector)
+        
+        if fused:
+            for elem in tree.iter(*fused):
+                for values, required, attr_name in fused[elem.tag]:
+                    if required and elem.get(required) is None:
+                        continue
+                    if attr_name:
+                        value = elem.get(attr_name)
+                        if value:
+                            values.append(value)
+                    else:
+                        values.append(node_text(elem))
+        
+        return data
+    
+    async def _fetch_body_async(self, session: 'aiohttp.ClientSession',
+                                url: str) -> Optional[tuple]:
+        """异步下载页面，返回 (响应体, Content-Type)，失败时返回None"""
+        memo = self._memo_get(url)
+        if memo is not None:
+            logger.info(f"使用本次运行中已下载的页面: {url}")
+            return memo
+        
+        cache_headers = self.cache.conditional_headers(url) if self.cache is not None else {}
+        logger.info(f"正在抓取: {url}")
+        for attempt in range(_ASYNC_RETRIES + 1):
+            try:
+                async with session.get(url, headers=cache_headers,
+                                       timeout=aiohttp.ClientTimeout(total=30)) as response:
+                    response.raise_for_status()
+                    if response.status == 304:
+                        # 缓存读写都是磁盘操作，放到线程中执行，不阻塞事件循环
+                        cached = (await asyncio.to_thread(self.cache.load, url)
+                                  if self.cache is not None else None)
+                        if cached is None:
+                            logger.error(f"抓取页面失败 {url}: 服务器返回 304，但没有缓存内容")
+                            return None
+                        logger.info(f"页面未修改，使用缓存: {url}")
+                        self._memo_put(url, *cached)
+                        return cached
+                    buffer = bytearray()
+                    truncated = False
+                    async for chunk in response.content.iter_chunked(65536):
+                        buffer += chunk
+                        if len(buffer) > self.max_bytes:
+                            # 超出大小上限：只解析上限以内的部分，不再继续下载
+                            del buffer[self.max_bytes:]
+                            truncated = True
+                            logger.warning(f"页面超过 {self.max_bytes} 字节，已截断: {url}")
+                            break
+                    content = bytes(buffer)
+                    content_type = response.headers.get('Content-Type', '')
+                break
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # 连接被重置、超时等瞬时错误按指数退避重试
+                if attempt == _ASYNC_RETRIES:
+                    logger.error(f"抓取页面失败 {url}: {e}")
+                    return None
+                logger.warning(f"抓取页面出错，第 {attempt + 1} 次重试 {url}: {e}")
+                await asyncio.sleep(_ASYNC_BACKOFF * 2 ** attempt)
+            except aiohttp.ClientError as e:
+                logger.error(f"抓取页面失败 {url}: {e}")
+                return None
+        
+        logger.info(f"成功抓取页面，大小: {len(content)} 字节")
+        self._memo_put(url, content, content_type)
+        if self.cache is not None and not truncated:
+            await asyncio.to_thread(self.cache.store, url, response.headers, content, content_type)
+        return content, content_type
+    
+    async def fetch_page_async(self, session: 'aiohttp.ClientSession', url: str) -> Optional[HtmlTree]:
+        """
+        异步获取网页内容，解析放到线程池中执行，不阻塞其他页面的下载
+        
+        Args:
+            session: aiohttp 会话
+            url: 网页URL
+            
+        Returns:
+            页面树或None
+        """
+        body = await self._fetch_body_async(session, url)
+        if body is None:
+            return None
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._parse_page, url, *body)
+    
+    def _parse_and_extract(self, url: str, content: bytes, content_type: str,
+                           plan: List[tuple]) -> Dict[str, Any]:
+        """解析页面并提取字段（在线程池中执行）"""
+        tree = self._parse_page(url, content, content_type)
+        if tree is None:
+            return {}
+        return self._extract_fields(url, tree, plan)
+    
+    async def crawl_multiple_pages_async(self, urls: List[str], selectors: Dict[str, str],
+                                         concurrency: int = 10) -> List[Dict[str, Any]]:
+        """
+        并发抓取多个页面：下载协程把响应体放入队列，解析协程从队列取出后
+        在线程池中解析和提取，网络等待与解析互相重叠。同时进行的请求数不超过 concurrency
+        
+        Args:
+            urls: URL列表
+            selectors: 选择器配置
+            concurrency: 最大并发数
+            
+        Returns:
+            抓取的数据列表（与 urls 顺序一致）
+        """
+        plan = self._prepare_selectors(selectors)
+        semaphore = asyncio.Semaphore(concurrency)
+        host_locks: Dict[str, asyncio.Lock] = {}
+        connector = aiohttp.TCPConnector(limit=concurrency * 2)
+        # 队列有上限：解析跟不上时下载协程在 put 处等待，已下载未解析的页面数有界
+        parse_queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        results: List[Any] = [None] * len(urls)
+        loop = asyncio.get_running_loop()
+        parse_workers = os.cpu_count() or 1
+        
+        headers = dict(self.session.headers)
+        if headers.get('Accept-Encoding') == DEFAULT_ACCEPT_ENCODING:
+            # aiohttp 支持的压缩编码取决于它自己检测到的库，交给它生成默认值
+            del headers['Accept-Encoding']
+        
+        async def fetch(index: int, url: str):
+            memo = self._memo_get(url)
+            if memo is not None:
+                # 已下载过的页面不占用并发名额，也不需要等待主机限速间隔
+                logger.info(f"使用本次运行中已下载的页面: {url}")
+                await parse_queue.put((index, url) + memo)
+                return
+            netloc = urlparse(url).netloc
+            lock = host_locks.setdefault(netloc, asyncio.Lock())
+            # 同一主机的请求依次等待限速间隔，等待期间不占用并发名额；
+            # 拿到名额后才记录请求时间，保证实际发出的请求按间隔分开
+            async with lock:
+                await asyncio.sleep(self._host_wait_time(netloc))
+                await semaphore.acquire()
+                self._mark_host_request(netloc)
+            try:
+                body = await self._fetch_body_async(session, url)
+                if body is not None:
+                    await parse_queue.put((index, url) + body)
+            finally:
+                semaphore.release()
         
+        async def parse(pool: ThreadPoolExecutor):
+            while True:
+                index, url, content, content_type = await parse_queue.get()
+                try:
+                    results[index] = await loop.run_in_executor(
+                        pool, self._parse_and_extract, url, content, content_type, plan)
+                except Exception as e:
+                    results[index] = e
+                finally:
+                    parse_queue.task_done()
+        
+        with ThreadPoolExecutor(max_workers=parse_workers) as pool:
+            # trust_env 与 requests 会话一致，使用环境变量中的代理设置和 .netrc
+            async with aiohttp.ClientSession(headers=headers, connector=connector,
+                                             trust_env=True) as session:
+                parsers = [asyncio.create_task(parse(pool)) for _ in range(parse_workers)]
+                try:
+                    fetched = await asyncio.gather(*(fetch(i, url) for i, url in enumerate(urls)),
+                                                   return_exceptions=True)
+                    await parse_queue.join()
+                finally:
+                    for task in parsers:
+                        task.cancel()
+                    await asyncio.gather(*parsers, return_exceptions=True)
+        
+        data = []
+        for url, error, result in zip(urls, fetched, results):
+            if isinstance(error, Exception):
+                result = error
+            if isinstance(result, Exception):
+                logger.error(f"抓取页面失败 {url}: {result}")
+            elif result:
+                data.append(result)
         return data
     
-    def crawl_multiple_pages(self, urls: List[str], selectors: Dict[str, str]) -> List[Dict[str, Any]]:
+    def crawl_multiple_pages(self, urls: List[str], selectors: Dict[str, str],
+                             concurrency: int = 10) -> List[Dict[str, Any]]:
         """
         抓取多个页面
         
         Args:
             urls: URL列表
             selectors: 选择器配置
+            concurrency: 最大并发数（需要 aiohttp，未安装时逐个抓取）
             
         Returns:
             抓取的数据列表
         """
-        results = []
-        
+        # 规范化后相同的URL只抓取一次（保留第一次出现时的原始写法）
+        unique = {}
         for url in urls:
-            data = self.crawl_single_page(url, selectors)
-            if data:
-                results.append(data)
+            unique.setdefault(_canonical_url(url), url)
+        if len(unique) < len(urls):
+            logger.info(f"跳过 {len(urls) - len(unique)} 个重复URL")
+        urls = list(unique.values())
         
+        if HAS_AIOHTTP and len(urls) > 1:
+            results = asyncio.run(self.crawl_multiple_pages_async(urls, selectors, concurrency))
+        else:
+            plan = self._prepare_selectors(selectors)
+            results = []
+            
+            for url in urls:
+                data = self._crawl_prepared(url, plan)
+                if data:
+                    results.append(data)
+        
+        self._save_cache()
         return results
     
     def save_to_json(self, data: List[Dict[str, Any]], output_file: str) -> None:
@@ -207,8 +852,12 @@ class WebCrawler:
             output_file: 输出文件路径
         """
         try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if HAS_ORJSON:
+                with open(output_file, 'wb') as f:
+                    _write_json_array(f, data)
+            else:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
             logger.info(f"数据已保存到: {output_file}")
         except Exception as e:
             logger.error(f"保存JSON文件失败: {e}")
@@ -226,26 +875,18 @@ class WebCrawler:
             return
         
         try:
-            # 获取所有字段名
-            fieldnames = set()
-            for item in data:
-                fieldnames.update(item.keys())
-            fieldnames = sorted(list(fieldnames))
+            # 获取所有字段名，按首次出现的顺序排列（url 在前，其余与选择器配置一致）
+            fieldnames = list(dict.fromkeys(key for item in data for key in item))
+            
+            # 列表类型的值用分号拼接，按字段顺序生成行，交给 writerows 一次写出
+            rows = ([('; '.join(map(str, value)) if isinstance(value, list) else value)
+                     for value in (item.get(field, '') for field in fieldnames)]
+                    for item in data)
             
             with open(output_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for item in data:
-                    # 处理列表类型的值
-                    row = {}
-                    for field in fieldnames:
-                        value = item.get(field, '')
-                        if isinstance(value, list):
-                            row[field] = '; '.join(str(v) for v in value)
-                        else:
-                            row[field] = value
-                    writer.writerow(row)
+                writer = csv.writer(f)
+                writer.writerow(fieldnames)
+                writer.writerows(rows)
             
             logger.info(f"数据已保存到: {output_file}")
         except Exception as e:
@@ -255,14 +896,18 @@ class WebCrawler:
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='网页数据抓取工具')
-    parser.add_argument('url', help='要抓取的网页URL')
+    parser.add_argument('url', nargs='+', help='要抓取的网页URL（可指定多个）')
     parser.add_argument('-o', '--output', help='输出文件路径')
     parser.add_argument('-f', '--format', choices=['json', 'csv'], default='json', 
                        help='输出格式（默认: json）')
     parser.add_argument('-s', '--selectors', nargs=2, action='append',
                        metavar=('FIELD', 'SELECTOR'), help='字段名和CSS选择器')
     parser.add_argument('--delay', type=float, default=1.0, help='请求间隔时间（秒）')
+    parser.add_argument('--concurrency', type=int, default=10, help='抓取多个页面时的最大并发数（默认: 10）')
     parser.add_argument('--user-agent', help='自定义User-Agent')
+    parser.add_argument('--max-bytes', type=int, default=5 * 1024 * 1024,
+                       help='单个页面最多读取的字节数，超出部分截断（默认: 5MB）')
+    parser.add_argument('--cache-dir', help='条件请求缓存目录（如 .crawl_cache），重复抓取时未修改的页面不再下载')
     parser.add_argument('--extract-links', action='store_true', help='提取所有链接')
     parser.add_argument('--extract-images', action='store_true', help='提取所有图片')
     
@@ -275,7 +920,8 @@ def main():
             headers['User-Agent'] = args.user_agent
         
         # 创建爬虫
-        crawler = WebCrawler(headers=headers, delay=args.delay)
+        crawler = WebCrawler(headers=headers, delay=args.delay, cache_dir=args.cache_dir,
+                             max_bytes=args.max_bytes)
         
         # 设置选择器
         selectors = {}
@@ -299,33 +945,39 @@ def main():
                 }
         
         # 抓取数据
-        data = crawler.crawl_single_page(args.url, selectors)
+        if len(args.url) == 1:
+            data = crawler.crawl_single_page(args.url[0], selectors)
+            results = [data] if data else []
+        else:
+            results = crawler.crawl_multiple_pages(args.url, selectors, args.concurrency)
         
-        if not data:
+        if not results:
             logger.error("没有抓取到数据")
             sys.exit(1)
         
         # 确定输出文件
         if not args.output:
-            parsed_url = urlparse(args.url)
+            parsed_url = urlparse(args.url[0])
             domain = parsed_url.netloc.replace('.', '_')
             args.output = f"crawled_{domain}.{args.format}"
         
         # 保存数据
         if args.format == 'json':
-            crawler.save_to_json([data], args.output)
+            crawler.save_to_json(results, args.output)
         else:
-            crawler.save_to_csv([data], args.output)
+            crawler.save_to_csv(results, args.output)
         
         # 显示结果摘要
         print(f"\n=== 抓取结果摘要 ===")
-        print(f"URL: {args.url}")
+        print(f"页面数: {len(results)}/{len({_canonical_url(url) for url in args.url})}")
         print(f"输出文件: {args.output}")
-        for field, value in data.items():
-            if isinstance(value, list):
-                print(f"{field}: {len(value)} 项")
-            else:
-                print(f"{field}: {value}")
+        for data in results:
+            print(f"\nURL: {data['url']}")
+            for field, value in data.items():
+                if isinstance(value, list):
+                    print(f"{field}: {len(value)} 项")
+                elif field != 'url':
+                    print(f"{field}: {value}")
         
     except Exception as e:
         logger.error(f"抓取失败: {e}")